@@ -4,9 +4,11 @@ Code Dependency Analyzer - Point d'entrée principal
 Orchestre l'analyse des dépendances de code Python
 """
 
+import json
 import sys
 import warnings
-from src.parser import CodeParser
+from pathlib import Path
+from src.parser import CodeParser, iter_python_files
 from src.graph_builder import GraphBuilder
 from src.metrics import MetricsCalculator
 from src.visualizer import GraphVisualizer
@@ -14,36 +16,53 @@ from src.git_manager import GitManager
 from src.html_reporter import HTMLReporter
 from src.security_analyzer import SecurityAnalyzer
 from src.attack_surface import AttackSurfaceAnalyzer
+from src.cache import CACHE_DIR, remove_legacy_files
 
 # Ignorer les SyntaxWarnings des projets analysés
 warnings.filterwarnings('ignore', category=SyntaxWarning)
 
 
-def main():
-    """Point d'entrée principal de l'application"""
+def analyze(repo_url: str, out_dir=".", split_tabs: bool = False, work_dir=".",
+            parallel: bool = True, clone_dir=None) -> dict:
+    """
+    Analyse complète d'un dépôt, appelable directement depuis Python
+    (interface web, workers) sans relancer d'interpréteur
+    
+    Args:
+        repo_url: URL du dépôt Git à analyser
+        out_dir: Dossier où écrire le rapport, les graphes et metrics.json
+        split_tabs: Écrire chaque onglet du rapport dans un fichier séparé
+        work_dir: Dossier contenant les clones (input_data) et le cache disque
+        parallel: Parser et analyser les gros projets sur plusieurs processus
+            (à désactiver dans un processus démon, ex: worker Celery prefork)
+        clone_dir: Dossier du clone (work_dir/input_data par défaut) ; à
+            fixer par analyse quand plusieurs tournent en même temps
+        
+    Returns:
+        Métriques résumées (identiques au contenu de metrics.json)
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    work_dir = Path(work_dir)
+    cache_dir = work_dir / CACHE_DIR
+    remove_legacy_files(cache_dir)
     print("Code Dependency Analyzer")
     print("=" * 50)
     print()
     
-    # Récupérer l'URL depuis les arguments ou utiliser une URL par défaut
-    if len(sys.argv) > 1:
-        repo_url = sys.argv[1]
-    else:
-        repo_url = "https://github.com/ndleah/python-mini-project.git"
-    
     # === ÉTAPE 1 : Cloner le dépôt Git ===
     print("ÉTAPE 1/4 : Clonage du dépôt")
     print("-" * 50)
     print(f"Repository: {repo_url}")
-    git_manager = GitManager("input_data")
+    git_manager = GitManager(str(clone_dir or work_dir / "input_data"))
     project_path = git_manager.clone_repository(repo_url)
     print()
     
     # === ÉTAPE 2 : Parser le code ===
     print("ÉTAPE 2/4 : Analyse du code source (AST)")
     print("-" * 50)
-    parser = CodeParser(str(project_path))
-    dependencies = parser.parse_project()
+    parser = CodeParser(str(project_path), cache_dir=cache_dir)
+    dependencies = parser.parse_project(parallel=parallel)
     external_deps = parser.get_all_external_dependencies()
     print(f"{len(dependencies)} fichiers Python analysés")
     print(f"Fichiers trouvés : {list(dependencies.keys())[:5]}{'...' if len(dependencies) > 5 else ''}")
@@ -84,10 +103,9 @@ def main():
     security = SecurityAnalyzer()
     
     # Analyser chaque fichier
-    python_files = list(project_path.rglob("*.py"))
-    for file_path in python_files:
-        module_name = str(file_path.relative_to(project_path))
-        security.analyze_file(file_path, module_name)
+    python_files = [Path(file_path) for file_path in iter_python_files(project_path)]
+    file_entries = [(file_path, str(file_path.relative_to(project_path))) for file_path in python_files]
+    security.analyze_files(file_entries, cache_dir=cache_dir, parallel=parallel)
     
     security_summary = security.get_summary()
     print(f"Analyse de sécurité terminée")
@@ -103,8 +121,7 @@ def main():
     attack_surface = AttackSurfaceAnalyzer(graph)
     
     # Analyser chaque fichier pour les points d'entrée
-    for file_path in python_files:
-        module_name = str(file_path.relative_to(project_path))
+    for file_path, module_name in file_entries:
         attack_surface.analyze_file(file_path, module_name)
     print()
     
@@ -154,11 +171,12 @@ def main():
     visualizer = GraphVisualizer(graph)
     
     # Graphes statiques (PNG)
-    visualizer.draw_simple("output_graph_simple.png")
-    visualizer.draw_with_metrics(metrics, "output_graph_metrics.png")
+    visualizer.draw_simple(str(out_dir / "output_graph_simple.png"))
+    visualizer.draw_with_metrics(metrics, str(out_dir / "output_graph_metrics.png"))
+    visualizer.close()
     
     # Graphe interactif (HTML) avec sécurité
-    interactive_graph = visualizer.draw_interactive(metrics, "graph_interactive.html", security)
+    interactive_graph = visualizer.draw_interactive(metrics, str(out_dir / "graph_interactive.html"), security)
     
     print()
     
@@ -172,12 +190,23 @@ def main():
     
     html_reporter = HTMLReporter(graph, metrics, graph_info, project_name, external_deps, security, attack_surface, project_path=project_path)
     html_file = html_reporter.generate_report(
-        "report.html",
+        str(out_dir / "report.html"),
         "output_graph_simple.png",
         "output_graph_metrics.png",
-        "graph_interactive.html"
+        "graph_interactive.html",
+        split_tabs=split_tabs
     )
     
+    # Métriques structurées pour l'interface web (évite de parser la sortie console)
+    run_metrics = {
+        'modules': graph_info['nodes'],
+        'deps': graph_info['edges'],
+        'vuln': security_summary['by_severity'],
+        'attack_surface': surface_summary['total_entry_points']
+    }
+    with open(out_dir / "metrics.json", "w", encoding="utf-8") as f:
+        json.dump(run_metrics, f, ensure_ascii=False)
+    
     print()
     print("=" * 50)
     print("Analyse terminée avec succès !")
@@ -186,10 +215,29 @@ def main():
     print("   • output_graph_metrics.png")
     print(f"   • graph_interactive.html (INTERACTIF)")
     print(f"   • {html_file}")
+    print("   • metrics.json")
     print()
     print(f"Ouvrez {html_file} dans votre navigateur !")
     print(f"Ou explorez le graphe interactif : graph_interactive.html")
     print("=" * 50)
+    
+    return run_metrics
+
+
+def main():
+    """Point d'entrée principal de l'application"""
+    # Récupérer l'URL depuis les arguments ou utiliser une URL par défaut
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    split_tabs = '--split-tabs' in sys.argv[1:]
+    # Options --nom=valeur (ex: --output-dir=web_reports/analysis_3, --clone-dir=...)
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    if args:
+        repo_url = args[0]
+    else:
+        repo_url = "https://github.com/ndleah/python-mini-project.git"
+    
+    analyze(repo_url, out_dir=options.get('output-dir', '.'), split_tabs=split_tabs,
+            clone_dir=options.get('clone-dir'))
 
 
 if __name__ == "__main__":
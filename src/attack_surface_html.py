@@ -2,6 +2,17 @@
 Extension du générateur HTML pour la section Attack Surface
 """
 
+from src.html_escape import esc
+
+
+# Couleur du badge selon le niveau de risque
+RISK_COLORS = {
+    'CRITIQUE': '#dc2626',
+    'ÉLEVÉ': '#f59e0b',
+    'MOYEN': '#eab308',
+    'FAIBLE': '#10b981'
+}
+
 
 def generate_attack_surface_section(attack_surface_analyzer) -> str:
     """
@@ -41,40 +52,43 @@ def generate_attack_surface_section(attack_surface_analyzer) -> str:
     </div>
     """
     
-    # Liste des points d'entrée
-    entry_points_html = "<h3 style='margin-top: 30px;'>🌐 Points d'Entrée Détectés</h3>"
-    entry_points_html += "<div style='margin: 20px 0;'>"
+    # Liste des points d'entrée (fragments assemblés en une seule fois avec join)
+    entry_parts = [
+        "<h3 style='margin-top: 30px;'>🌐 Points d'Entrée Détectés</h3>",
+        "<div style='margin: 20px 0;'>"
+    ]
     
     for module, entries in attack_surface_analyzer.entry_points.items():
-        entry_points_html += f"""
+        entry_parts.append(f"""
         <div style="background: #f8f9fa; padding: 15px; border-left: 4px solid #667eea; margin-bottom: 15px; border-radius: 4px;">
-            <div style="font-weight: bold; color: #333; margin-bottom: 8px;">📁 {module}</div>
+            <div style="font-weight: bold; color: #333; margin-bottom: 8px;">📁 {esc(module)}</div>
             <div style="margin-left: 15px;">
-        """
+        """)
         
         for entry in entries:
-            path = entry.get('path', 'N/A')
-            methods = ', '.join(entry.get('methods', [])) if entry.get('methods') else 'ALL'
-            entry_points_html += f"""
+            path = esc(entry.get('path', 'N/A'))
+            methods = esc(', '.join(entry.get('methods', []))) if entry.get('methods') else 'ALL'
+            entry_parts.append(f"""
                 <div style="color: #666; font-size: 0.9em; margin: 5px 0;">
-                    <span style="background: #667eea; color: white; padding: 2px 8px; border-radius: 3px; font-family: monospace; font-size: 0.85em;">{entry['type']}</span>
-                    <code style="background: white; padding: 3px 6px; border-radius: 3px; margin: 0 5px;">{entry['function']}()</code>
+                    <span style="background: #667eea; color: white; padding: 2px 8px; border-radius: 3px; font-family: monospace; font-size: 0.85em;">{esc(entry['type'])}</span>
+                    <code style="background: white; padding: 3px 6px; border-radius: 3px; margin: 0 5px;">{esc(entry['function'])}()</code>
                     <span style="color: #999;">→</span> {path}
                     <span style="color: #999; font-size: 0.85em;">[{methods}]</span>
                 </div>
-            """
+            """)
         
-        entry_points_html += "</div></div>"
+        entry_parts.append("</div></div>")
     
-    entry_points_html += "</div>"
+    entry_parts.append("</div>")
+    entry_points_html = ''.join(entry_parts)
     
     # Tableau des chemins à risque
-    risk_table_html = "<h3 style='margin-top: 30px;'>⚠️ Chemins à Risque</h3>"
+    risk_parts = ["<h3 style='margin-top: 30px;'>⚠️ Chemins à Risque</h3>"]
     
     if not top_risks:
-        risk_table_html += "<p style='color: #666;'>Aucun chemin critique détecté.</p>"
+        risk_parts.append("<p style='color: #666;'>Aucun chemin critique détecté.</p>")
     else:
-        risk_table_html += """
+        risk_parts.append("""
         <table style="width: 100%; border-collapse: collapse; margin-top: 15px; background: white; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
             <thead>
                 <tr style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white;">
@@ -87,20 +101,14 @@ def generate_attack_surface_section(attack_surface_analyzer) -> str:
                 </tr>
             </thead>
             <tbody>
-        """
+        """)
         
         for i, risk in enumerate(top_risks):
             # Couleur selon le risque
-            risk_colors = {
-                'CRITIQUE': '#dc2626',
-                'ÉLEVÉ': '#f59e0b',
-                'MOYEN': '#eab308',
-                'FAIBLE': '#10b981'
-            }
-            color = risk_colors.get(risk['risk_level'], '#999')
+            color = RISK_COLORS.get(risk['risk_level'], '#999')
             bg_color = '#fff5f5' if risk['risk_level'] == 'CRITIQUE' else '#fffbeb' if risk['risk_level'] == 'ÉLEVÉ' else 'white'
             
-            risk_table_html += f"""
+            risk_parts.append(f"""
                 <tr style="background: {bg_color}; border-bottom: 1px solid #e5e7eb;">
                     <td style="padding: 12px;">
                         <span style="background: {color}; color: white; padding: 4px 12px; border-radius: 4px; font-weight: bold; font-size: 0.85em;">
@@ -108,13 +116,13 @@ def generate_attack_surface_section(attack_surface_analyzer) -> str:
                         </span>
                     </td>
                     <td style="padding: 12px; font-family: monospace; font-size: 0.85em; color: #333;">
-                        {risk['entry_function']}()
+                        {esc(risk['entry_function'])}()
                     </td>
                     <td style="padding: 12px; color: #666; font-size: 0.9em;">
-                        {risk['entry_path']}
+                        {esc(risk['entry_path'])}
                     </td>
                     <td style="padding: 12px; font-family: monospace; font-size: 0.85em; color: #667eea;">
-                        {risk['target_module']}
+                        {esc(risk['target_module'])}
                     </td>
                     <td style="padding: 12px; text-align: center; font-weight: bold;">
                         {risk['distance']} sauts
@@ -123,12 +131,13 @@ def generate_attack_surface_section(attack_surface_analyzer) -> str:
                         {risk['centrality']:.3f}
                     </td>
                 </tr>
-            """
+            """)
         
-        risk_table_html += """
+        risk_parts.append("""
             </tbody>
         </table>
-        """
+        """)
+    risk_table_html = ''.join(risk_parts)
     
     # Explication
     explanation = """
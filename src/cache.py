@@ -0,0 +1,109 @@
+"""
+Cache disque partagé entre les exécutions de l'analyseur
+Permet de ne retraiter que les fichiers modifiés depuis la dernière analyse
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Union
+
+
+# Dossier du cache disque (relatif au répertoire d'exécution)
+CACHE_DIR = Path('.code_analyser_cache')
+
+# Fichiers de l'ancien cache shelve des sources du rapport (indexé par mtime,
+# retiré depuis) : ils contiennent une copie des sources des dépôts analysés
+LEGACY_CACHE_FILES = ('source_files', 'source_files.db', 'source_files.dat',
+                      'source_files.dir', 'source_files.bak')
+
+
+def file_digest(file_path, salt: str = '') -> str:
+    """
+    Calcule la clé de cache d'un fichier à partir de son contenu
+    
+    Le dépôt analysé est recloné à chaque exécution : les mtime changent
+    toujours, seul le contenu permet de reconnaître un fichier inchangé.
+    
+    Args:
+        file_path: Chemin du fichier
+        salt: Texte ajouté devant le contenu (ex: nom du module quand le
+            résultat en dépend)
+    
+    Returns:
+        Empreinte BLAKE2b (hexadécimale) du sel et du contenu
+    """
+    digest = hashlib.blake2b(salt.encode('utf-8', 'surrogateescape'), digest_size=20)
+    with open(file_path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_cache(cache_path, version: Union[int, str]) -> Dict[str, dict]:
+    """
+    Charge les entrées d'un fichier de cache
+    
+    Args:
+        cache_path: Chemin du fichier de cache JSON
+        version: Version attendue du format et des règles qui l'ont produit
+    
+    Returns:
+        Entrées du cache (vide s'il est absent, illisible ou d'une autre version)
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != version:
+        return {}
+    return data.get('entries', {})
+
+
+def save_cache(cache_path, version: Union[int, str], entries: Dict[str, dict], max_entries: int):
+    """
+    Écrit un fichier de cache de façon atomique
+    
+    Le fichier est écrit sous un nom temporaire unique puis renommé : des
+    analyses concurrentes ne peuvent pas entrelacer leurs écritures, la
+    dernière remplace simplement l'autre.
+    
+    Args:
+        cache_path: Chemin du fichier de cache JSON
+        version: Version du format et des règles qui ont produit les entrées
+        entries: Entrées, de la moins à la plus récemment utilisée
+        max_entries: Nombre maximal d'entrées conservées (les plus anciennes sont évincées)
+    """
+    cache_path = Path(cache_path)
+    for key in list(entries)[:max(0, len(entries) - max_entries)]:
+        del entries[key]
+    
+    tmp_path = None
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=cache_path.name, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'entries': entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️  Impossible d'écrire le cache {cache_path.name} : {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def remove_legacy_files(cache_dir):
+    """
+    Supprime les fichiers laissés dans le dossier de cache par l'ancien cache shelve
+    
+    Args:
+        cache_dir: Dossier du cache disque
+    """
+    for name in LEGACY_CACHE_FILES:
+        try:
+            (Path(cache_dir) / name).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️  Impossible de supprimer l'ancien cache {name} : {e}")
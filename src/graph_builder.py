@@ -91,9 +91,14 @@ class GraphBuilder:
             if self.graph.number_of_nodes() > max_nodes:
                 return []
             
-            cycles = list(nx.simple_cycles(self.graph))
+            # Johnson uniquement sur les composantes fortement connexes non triviales
+            cycles = []
+            for component in nx.strongly_connected_components(self.graph):
+                if len(component) < 2:
+                    continue
+                cycles.extend(nx.simple_cycles(self.graph.subgraph(component)))
             return cycles
-        except:
+        except Exception:
             return []
     
     def get_graph_info(self) -> dict:
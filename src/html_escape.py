@@ -0,0 +1,19 @@
+"""
+Échappement HTML partagé par les générateurs de rapport et de graphes
+Les noms de modules, fonctions et routes viennent du dépôt analysé
+"""
+
+
+# Table d'échappement HTML (str.translate est implémenté en C)
+HTML_ESC = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#39;'
+})
+
+
+def esc(value) -> str:
+    """Échappe une valeur pour l'insérer dans le HTML"""
+    return str(value).translate(HTML_ESC) if value else ''
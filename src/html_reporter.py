@@ -4,11 +4,179 @@ Crée une page web dashboard interactive
 """
 
 import networkx as nx
+import gzip
+import io
 import json
+import linecache
+import mmap
 import os
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from src.attack_surface_html import generate_attack_surface_section
+from src.html_escape import esc as _esc
+
+# orjson (optionnel) sérialise bien plus vite que json pour les payloads embarqués
+try:
+    import orjson
+    _dumps = lambda obj: orjson.dumps(obj).decode()
+except ImportError:
+    orjson = None
+    _dumps = lambda obj: json.dumps(obj, ensure_ascii=False)
+
+
+class _ScriptSafeWriter:
+    """Transmet les morceaux écrits par json.dump en échappant "</" au passage"""
+    
+    def __init__(self, buf):
+        self._buf = buf
+    
+    def write(self, chunk: str):
+        # "<" et "/" n'apparaissent que dans les chaînes JSON, que json.dump
+        # émet chacune d'un seul morceau : "</" n'est jamais coupé en deux
+        self._buf.write(chunk.replace('</', '<\\/'))
+
+
+def _write_script_json(buf, obj):
+    """
+    Écrit obj en JSON dans buf, sans "</" pour pouvoir l'inclure dans un <script>
+    
+    Args:
+        buf: Flux texte de destination
+        obj: Objet sérialisable en JSON
+    """
+    if orjson is not None:
+        # L'échappement se fait sur les octets : une seule chaîne str est créée
+        buf.write(orjson.dumps(obj).replace(b'</', b'<\\/').decode())
+    else:
+        json.dump(obj, _ScriptSafeWriter(buf), ensure_ascii=False)
+
+# Taille à partir de laquelle les snippets sont lus via mmap plutôt que mis en cache
+MMAP_THRESHOLD = 1024 * 1024
+
+# Nombre maximal de fichiers sources gardés en mémoire pour les snippets (LRU)
+SNIPPET_CACHE_SIZE = 32
+
+# Marqueur des modules dont le fichier source est introuvable (cache de chemins)
+_NOT_FOUND = object()
+
+# Classe CSS du badge selon la sévérité d'une vulnérabilité
+_SEVERITY_BADGE = {
+    'CRITIQUE': 'badge-danger',
+    'ÉLEVÉ': 'badge-warning',
+    'MOYEN': 'badge-info'
+}
+
+# Badge d'une dépendance externe (onglet Dépendances)
+_DEP_BADGE_FMT = '<span class="badge badge-info" style="margin: 5px;">{}</span>'
+
+# Cellules d'une ligne du tableau des vulnérabilités (onglet Sécurité)
+_VULN_CELL_FMTS = (
+    '<span class="badge {cls}">{severity}</span>',
+    '<span style="font-family: monospace; font-size: 0.9em;">{module}</span>',
+    '{type}',
+    '<span style="color: #dc2626; font-weight: 600;">{function}</span>',
+    '<span style="color: #64748b;">{description}</span>',
+    '{line}'
+)
+
+# Librairies front-end du tableau virtualisé des vulnérabilités (DataTables + Scroller),
+# en versions figées ; crossorigin permet au navigateur de vérifier l'empreinte
+# integrity, et un fichier refusé ou injoignable laisse le rendu HTML simple
+_DATATABLES_CSS = """
+    <link rel="stylesheet" href="https://cdn.datatables.net/2.0.8/css/dataTables.dataTables.min.css" crossorigin="anonymous">
+    <link rel="stylesheet" href="https://cdn.datatables.net/scroller/2.4.3/css/scroller.dataTables.min.css" crossorigin="anonymous">"""
+_DATATABLES_JS = """
+    <script src="https://code.jquery.com/jquery-3.7.1.min.js" integrity="sha384-1H217gwSVyLSIfaLxHbE7dRb3v4mYCKbpQvzx0cegeju1MVsGrX5xXxAvs/HgeFs" crossorigin="anonymous"></script>
+    <script src="https://cdn.datatables.net/2.0.8/js/dataTables.min.js" crossorigin="anonymous"></script>
+    <script src="https://cdn.datatables.net/scroller/2.4.3/js/dataTables.scroller.min.js" crossorigin="anonymous"></script>"""
+
+
+# Contenu statique de l'onglet Suggestions IA (le JSON des problèmes est ajouté à la suite)
+_AI_TAB_HTML = """
+        <div class="section-card" style="text-align: center; padding: 60px 40px;">
+            <div style="font-size: 4em; margin-bottom: 20px;">🤖</div>
+            <h2 style="margin-bottom: 15px;">Suggestions IA Interactives</h2>
+            <p style="color: #64748b; font-size: 1.1em; margin-bottom: 30px; max-width: 600px; margin-left: auto; margin-right: auto;">
+                Les suggestions IA avec génération dynamique sont disponibles dans l'interface web interactive.
+            </p>
+            
+            <div class="alert alert-info" style="max-width: 700px; margin: 0 auto 30px auto; text-align: left;">
+                <strong>🌐 Interface Web</strong><br>
+                Pour obtenir des suggestions IA en temps réel avec OpenAI, Claude ou Ollama :
+                <ol style="margin-top: 10px; margin-bottom: 0;">
+                    <li>Lancez l'interface web : <code>cd web_ui && python app.py</code></li>
+                    <li>Ouvrez <code>http://localhost:5000</code> dans votre navigateur</li>
+                    <li>Analysez votre projet</li>
+                    <li>Cliquez sur "🤖 Suggestions IA Interactives"</li>
+                </ol>
+            </div>
+            
+            <div style="background: var(--card-bg); border: 2px solid var(--border); border-radius: 12px; padding: 25px; max-width: 700px; margin: 0 auto; text-align: left;">
+                <h3 style="margin-bottom: 15px;">✨ Fonctionnalités disponibles dans l'interface web :</h3>
+                <ul style="line-height: 2; color: #64748b;">
+                    <li>🔒 Suggestions pour les vulnérabilités de sécurité</li>
+                    <li>🔄 Suggestions pour les dépendances circulaires</li>
+                    <li>✅ Code corrigé généré automatiquement</li>
+                    <li>📋 Étapes de correction détaillées</li>
+                    <li>📥 Copie du code en un clic</li>
+                    <li>🤖 Support OpenAI GPT-4, Claude 3.5, ou Ollama (local)</li>
+                </ul>
+            </div>
+            
+            <p style="color: #94a3b8; margin-top: 30px; font-size: 0.95em;">
+                💡 Consultez <code>AI_ADVISOR_GUIDE.md</code> et <code>OLLAMA_DOCKER_SETUP.md</code> pour configurer l'IA
+            </p>
+        </div>
+        
+        <!-- Script JSON caché pour l'API -->
+"""
+
+
+def _write_html(path, content: str):
+    """
+    Écrit un fichier HTML et sa version compressée (path + '.gz')
+    
+    La version gzip peut être servie directement avec Content-Encoding: gzip.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    with gzip.open(f'{path}.gz', 'wt', compresslevel=6, encoding='utf-8') as f:
+        f.write(content)
+
+
+def _read_lines(path: str, start: int, end: int) -> list:
+    """
+    Lit les lignes [start, end[ d'un fichier sans le copier entièrement en mémoire
+    
+    Args:
+        path: Chemin du fichier
+        start: Index (0-based) de la première ligne
+        end: Index de fin (exclu)
+    
+    Returns:
+        Liste des lignes décodées (avec leurs fins de ligne)
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Avancer jusqu'au début de la première ligne voulue
+            pos = 0
+            for _ in range(start):
+                pos = mm.find(b'\n', pos) + 1
+                if pos == 0:
+                    return []
+            
+            # Délimiter la fenêtre sans lire la suite du fichier
+            begin = pos
+            for _ in range(end - start):
+                next_pos = mm.find(b'\n', pos)
+                if next_pos == -1:
+                    pos = len(mm)
+                    break
+                pos = next_pos + 1
+            
+            return mm[begin:pos].decode('utf-8').splitlines(keepends=True)
 
 
 class HTMLReporter:
@@ -24,23 +192,69 @@ class HTMLReporter:
         self.attack_surface = attack_surface
         self.project_path = Path(project_path) if project_path else None
         
+        # Horodatage figé à la création pour un rapport reproductible
+        self._timestamp = datetime.now().strftime('%d/%m/%Y %H:%M')
+        
         # Créer un mapping module_name -> file_path pour extraction de code
-        self.module_to_file = {}
-        for node_name, data in self.graph.nodes(data=True):
-            if 'file' in data:
-                self.module_to_file[node_name] = data['file']
+        self.module_to_file = {
+            node_name: node_file
+            for node_name, node_file in self.graph.nodes(data='file')
+            if node_file is not None
+        }
         
-        # Cache pour éviter de relire les mêmes fichiers
-        self._file_cache = {}
+        # Les snippets passent par linecache : invalider les entrées périmées
+        linecache.checkcache()
+        
+        # Fichiers actuellement dans linecache, du moins au plus récemment utilisé
+        self._snippet_files = OrderedDict()
+        
+        # Cache de résolution module -> chemin du fichier (_NOT_FOUND si introuvable)
+        self._path_cache = {}
+        
+        # Classement complet de chaque métrique, trié une seule fois
+        self._sorted_metrics = {
+            metric: sorted(values.items(), key=lambda x: x[1], reverse=True)
+            for metric, values in self.metrics.items()
+        }
+        
+        # Onglets écrits dans des fichiers séparés (mode split_tabs)
+        self._tab_files = None
+        self._tab_prefix = None
     
     def generate_report(self, output_file: str = "report.html", 
                        img_simple: str = "output_graph_simple.png",
                        img_metrics: str = "output_graph_metrics.png",
-                       interactive_graph: str = "graph_interactive.html"):
-        html_content = self._generate_dashboard_html(img_simple, img_metrics, interactive_graph)
+                       interactive_graph: str = "graph_interactive.html",
+                       split_tabs: bool = False):
+        """
+        Génère le rapport HTML
+        
+        Args:
+            output_file: Fichier HTML de sortie
+            img_simple: Image du graphe simple
+            img_metrics: Image du graphe avec métriques
+            interactive_graph: Fichier du graphe interactif
+            split_tabs: Écrire chaque onglet (hors vue d'ensemble) dans un fichier
+                voisin chargé à la demande par le navigateur
+        """
+        output_path = Path(output_file)
+        self._tab_files = {} if split_tabs else None
+        self._tab_prefix = output_path.stem
+        
+        try:
+            html_content = self._generate_dashboard_html(img_simple, img_metrics, interactive_graph)
+        finally:
+            # linecache est global au processus : ne pas y laisser les sources du
+            # dépôt analysé (un worker Celery enchaîne les analyses)
+            self._release_snippet_files()
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        _write_html(output_file, html_content)
+        
+        if self._tab_files:
+            for tab_file, tab_content in self._tab_files.items():
+                _write_html(output_path.with_name(tab_file), tab_content)
+                print(f"✅ Onglet généré : {output_path.with_name(tab_file)}")
+        self._tab_files = None
         
         print(f"✅ Rapport HTML généré : {output_file}")
         return output_file
@@ -52,7 +266,8 @@ class HTMLReporter:
         security_summary = self.security.get_summary() if self.security else None
         attack_summary = self.attack_surface.get_summary() if self.attack_surface and self.attack_surface.entry_points else None
         
-        # Générer les sections
+        # Générer les sections (séquentiellement : du Python pur qui garde le GIL,
+        # un pool de threads n'apporterait que son propre surcoût)
         overview_tab = self._generate_overview_tab(security_summary, attack_summary)
         metrics_tab = self._generate_metrics_tab()
         security_tab = self._generate_security_tab() if self.security else ""
@@ -66,7 +281,7 @@ class HTMLReporter:
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Dashboard - {self.project_name}</title>
+    <title>Dashboard - {_esc(self.project_name)}</title>
     {self._get_styles()}
 </head>
 <body>
@@ -74,8 +289,8 @@ class HTMLReporter:
         <nav class="sidebar">
             <div class="sidebar-header">
                 <h1>📊 Code Analyzer</h1>
-                <p>{self.project_name}</p>
-                <small>{datetime.now().strftime('%d/%m/%Y %H:%M')}</small>
+                <p>{_esc(self.project_name)}</p>
+                <small>{self._timestamp}</small>
             </div>
             <div class="nav-tabs">
                 <div class="nav-tab active" data-tab="overview">
@@ -114,23 +329,17 @@ class HTMLReporter:
                 {overview_tab}
             </div>
             
-            <div id="metrics" class="tab-content">
-                {metrics_tab}
-            </div>
+            {self._tab_container('metrics', metrics_tab)}
             
-            {f'<div id="security" class="tab-content">{security_tab}</div>' if self.security else ''}
+            {self._tab_container('security', security_tab) if self.security else ''}
             
-            {f'<div id="attack-surface" class="tab-content">{attack_tab}</div>' if attack_summary else ''}
+            {self._tab_container('attack-surface', attack_tab) if attack_summary else ''}
             
             {f'<div id="ai-suggestions" class="tab-content">{ai_tab}</div>' if self.security else ''}
             
-            <div id="dependencies" class="tab-content">
-                {deps_tab}
-            </div>
+            {self._tab_container('dependencies', deps_tab)}
             
-            <div id="graphs" class="tab-content">
-                {graphs_tab}
-            </div>
+            {self._tab_container('graphs', graphs_tab)}
         </main>
     </div>
     
@@ -140,9 +349,24 @@ class HTMLReporter:
 </body>
 </html>"""
 
+    def _tab_container(self, tab_id: str, content: str) -> str:
+        """
+        Enveloppe le contenu d'un onglet
+        
+        En mode split_tabs, le contenu est mis de côté pour être écrit dans un
+        fichier voisin et l'onglet ne contient qu'une référence (data-src).
+        """
+        if self._tab_files is None:
+            return f'<div id="{tab_id}" class="tab-content">{content}</div>'
+        
+        tab_file = f'{self._tab_prefix}_{tab_id}.html'
+        self._tab_files[tab_file] = content
+        return f'<div id="{tab_id}" class="tab-content" data-src="{tab_file}"></div>'
+    
     def _get_styles(self):
         """Retourne le CSS complet"""
-        return """<style>
+        return _DATATABLES_CSS + """
+    <style>
         * {
             margin: 0;
             padding: 0;
@@ -587,7 +811,35 @@ class HTMLReporter:
 
     def _get_javascript(self):
         """Retourne le JavaScript pour les onglets"""
-        return """<script>
+        return _DATATABLES_JS + """
+    <script>
+        // Tableau des vulnérabilités : initialisé à la première ouverture de l'onglet
+        // (Scroller a besoin d'un conteneur visible pour calculer la hauteur des lignes)
+        function initVulnTable() {
+            const dataEl = document.getElementById('vulns-data');
+            const table = document.getElementById('vulns-table');
+            if (!dataEl || !table || table.dataset.ready || !table.offsetParent) {
+                return;
+            }
+            table.dataset.ready = '1';
+            const rows = JSON.parse(dataEl.textContent);
+            
+            if (typeof DataTable !== 'undefined') {
+                new DataTable(table, {
+                    data: rows,
+                    deferRender: true,
+                    scroller: true,
+                    scrollY: 500,
+                    scrollCollapse: true
+                });
+            } else {
+                // Librairie indisponible (hors ligne) : rendu HTML simple
+                table.querySelector('tbody').innerHTML = rows.map(
+                    row => '<tr>' + row.map(cell => '<td>' + cell + '</td>').join('') + '</tr>'
+                ).join('');
+            }
+        }
+        
         function showTab(tabId) {
             // Cacher tous les onglets
             document.querySelectorAll('.tab-content').forEach(tab => {
@@ -603,6 +855,18 @@ class HTMLReporter:
             const selectedTab = document.getElementById(tabId);
             if (selectedTab) {
                 selectedTab.classList.add('active');
+                
+                // Charger le contenu à la demande (rapport en onglets séparés)
+                if (selectedTab.dataset.src && !selectedTab.dataset.loaded) {
+                    selectedTab.dataset.loaded = '1';
+                    fetch(selectedTab.dataset.src)
+                        .then(response => response.text())
+                        .then(html => {
+                            selectedTab.innerHTML = html;
+                            initVulnTable();
+                        });
+                }
+                initVulnTable();
             }
             
             // Activer le nav-tab correspondant
@@ -732,7 +996,7 @@ class HTMLReporter:
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join([f'<tr><td>{i}</td><td>{mod}</td><td>{score:.3f}</td></tr>' 
+                    {''.join([f'<tr><td>{i}</td><td>{_esc(mod)}</td><td>{score:.3f}</td></tr>' 
                              for i, (mod, score) in enumerate(top_degree, 1)])}
                 </tbody>
             </table>
@@ -750,7 +1014,7 @@ class HTMLReporter:
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join([f'<tr><td>{i}</td><td>{mod}</td><td>{count}</td></tr>' 
+                    {''.join([f'<tr><td>{i}</td><td>{_esc(mod)}</td><td>{count}</td></tr>' 
                              for i, (mod, count) in enumerate(top_in, 1)])}
                 </tbody>
             </table>
@@ -768,7 +1032,7 @@ class HTMLReporter:
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join([f'<tr><td>{i}</td><td>{mod}</td><td>{count}</td></tr>' 
+                    {''.join([f'<tr><td>{i}</td><td>{_esc(mod)}</td><td>{count}</td></tr>' 
                              for i, (mod, count) in enumerate(top_out, 1)])}
                 </tbody>
             </table>
@@ -786,7 +1050,7 @@ class HTMLReporter:
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join([f'<tr><td>{i}</td><td>{mod}</td><td>{score:.3f}</td></tr>' 
+                    {''.join([f'<tr><td>{i}</td><td>{_esc(mod)}</td><td>{score:.3f}</td></tr>' 
                              for i, (mod, score) in enumerate(top_betweenness, 1)])}
                 </tbody>
             </table>
@@ -805,25 +1069,21 @@ class HTMLReporter:
         for module_name, vulns_list in self.security.vulnerabilities.items():
             all_vulns.extend(vulns_list)
         
-        # Générer le tableau des vulnérabilités
+        # Données du tableau des vulnérabilités : toutes les lignes sont envoyées
+        # en JSON, le navigateur n'affiche que les lignes visibles (DataTables + Scroller)
         vuln_rows = []
-        for vuln in all_vulns[:50]:  # Limiter à 50 pour la performance
-            severity_class = {
-                'CRITIQUE': 'badge-danger',
-                'ÉLEVÉ': 'badge-warning',
-                'MOYEN': 'badge-info'
-            }.get(vuln['severity'], 'badge-info')
-            
-            vuln_rows.append(f"""
-            <tr>
-                <td><span class="badge {severity_class}">{vuln['severity']}</span></td>
-                <td style="font-family: monospace; font-size: 0.9em;">{vuln['module']}</td>
-                <td>{vuln.get('type', 'N/A')}</td>
-                <td style="color: #dc2626; font-weight: 600;">{vuln['function']}</td>
-                <td style="color: #64748b;">{vuln.get('description', '')}</td>
-                <td style="text-align: center;">{vuln['line']}</td>
-            </tr>
-            """)
+        for vuln in all_vulns:
+            fields = {
+                'cls': _SEVERITY_BADGE.get(vuln['severity'], 'badge-info'),
+                'severity': _esc(vuln['severity']),
+                'module': _esc(vuln['module']),
+                'type': _esc(vuln.get('type', 'N/A')),
+                'function': _esc(vuln['function']),
+                'description': _esc(vuln.get('description', '')),
+                'line': vuln['line']
+            }
+            vuln_rows.append([fmt.format_map(fields) for fmt in _VULN_CELL_FMTS])
+        vuln_rows_json = _dumps(vuln_rows)
         
         return f"""
         <div class="stats-grid">
@@ -849,7 +1109,7 @@ class HTMLReporter:
         
         <div class="section-card">
             <h2>🔒 Détail des Vulnérabilités</h2>
-            <table>
+            <table id="vulns-table" class="display" style="width: 100%;">
                 <thead>
                     <tr>
                         <th>Sévérité</th>
@@ -860,10 +1120,9 @@ class HTMLReporter:
                         <th>Ligne</th>
                     </tr>
                 </thead>
-                <tbody>
-                    {''.join(vuln_rows)}
-                </tbody>
+                <tbody></tbody>
             </table>
+            <script id="vulns-data" type="application/json">{vuln_rows_json}</script>
         </div>
         """
     
@@ -872,21 +1131,21 @@ class HTMLReporter:
         if not self.attack_surface or not self.attack_surface.entry_points:
             return ""
         
+        # Import différé : inutile quand le projet n'a pas de surface d'attaque
+        from src.attack_surface_html import generate_attack_surface_section
         return generate_attack_surface_section(self.attack_surface)
     
     def _generate_dependencies_tab(self):
         """Génère l'onglet dépendances"""
         cycles_html = self._generate_cycles_section()
         
-        deps_badges = []
-        for dep in sorted(self.external_deps):
-            deps_badges.append(f'<span class="badge badge-info" style="margin: 5px;">{dep}</span>')
+        deps_badges = ''.join(_DEP_BADGE_FMT.format(_esc(dep)) for dep in sorted(self.external_deps))
         
         return f"""
         <div class="section-card">
             <h2>📦 Dépendances Externes ({len(self.external_deps)})</h2>
             <div style="margin-top: 20px;">
-                {''.join(deps_badges) if deps_badges else '<p style="color: #64748b;">Aucune dépendance externe détectée</p>'}
+                {deps_badges if deps_badges else '<p style="color: #64748b;">Aucune dépendance externe détectée</p>'}
             </div>
         </div>
         
@@ -947,49 +1206,16 @@ class HTMLReporter:
         # La détection de cycles est trop lente sur gros graphes
         # Les cycles sont déjà affichés dans l'onglet Dépendances
         
-        issues_json = json.dumps(issues, ensure_ascii=False)
-        
-        return f"""
-        <div class="section-card" style="text-align: center; padding: 60px 40px;">
-            <div style="font-size: 4em; margin-bottom: 20px;">🤖</div>
-            <h2 style="margin-bottom: 15px;">Suggestions IA Interactives</h2>
-            <p style="color: #64748b; font-size: 1.1em; margin-bottom: 30px; max-width: 600px; margin-left: auto; margin-right: auto;">
-                Les suggestions IA avec génération dynamique sont disponibles dans l'interface web interactive.
-            </p>
-            
-            <div class="alert alert-info" style="max-width: 700px; margin: 0 auto 30px auto; text-align: left;">
-                <strong>🌐 Interface Web</strong><br>
-                Pour obtenir des suggestions IA en temps réel avec OpenAI, Claude ou Ollama :
-                <ol style="margin-top: 10px; margin-bottom: 0;">
-                    <li>Lancez l'interface web : <code>cd web_ui && python app.py</code></li>
-                    <li>Ouvrez <code>http://localhost:5000</code> dans votre navigateur</li>
-                    <li>Analysez votre projet</li>
-                    <li>Cliquez sur "🤖 Suggestions IA Interactives"</li>
-                </ol>
-            </div>
-            
-            <div style="background: var(--card-bg); border: 2px solid var(--border); border-radius: 12px; padding: 25px; max-width: 700px; margin: 0 auto; text-align: left;">
-                <h3 style="margin-bottom: 15px;">✨ Fonctionnalités disponibles dans l'interface web :</h3>
-                <ul style="line-height: 2; color: #64748b;">
-                    <li>🔒 Suggestions pour les vulnérabilités de sécurité</li>
-                    <li>🔄 Suggestions pour les dépendances circulaires</li>
-                    <li>✅ Code corrigé généré automatiquement</li>
-                    <li>📋 Étapes de correction détaillées</li>
-                    <li>📥 Copie du code en un clic</li>
-                    <li>🤖 Support OpenAI GPT-4, Claude 3.5, ou Ollama (local)</li>
-                </ul>
-            </div>
-            
-            <p style="color: #94a3b8; margin-top: 30px; font-size: 0.95em;">
-                💡 Consultez <code>AI_ADVISOR_GUIDE.md</code> et <code>OLLAMA_DOCKER_SETUP.md</code> pour configurer l'IA
-            </p>
-        </div>
-        
-        <!-- Script JSON caché pour l'API -->
-        <script id="ai-issues" type="application/json">
-        {issues_json}
-        </script>
-        """
+        # Le JSON est écrit directement dans le buffer de l'onglet, sans être
+        # recopié dans un f-string intermédiaire
+        buf = io.StringIO()
+        buf.write(_AI_TAB_HTML)
+        buf.write('        <script id="ai-issues" type="application/json">\n        ')
+        # Les snippets viennent du dépôt analysé : "</" est échappé pour
+        # qu'aucun "</script>" ne ferme la balise avant la fin du JSON
+        _write_script_json(buf, issues)
+        buf.write('\n        </script>\n        ')
+        return buf.getvalue()
     
     def _extract_code_snippet(self, module_name: str, line_number: int, context_lines: int = 2) -> str:
         """Extrait un snippet de code autour d'une ligne donnée"""
@@ -997,45 +1223,73 @@ class HTMLReporter:
             return ""
         
         try:
-            # module_name peut être un chemin relatif comme "src/mymodule.py" ou "Word_Jumble/word_jumble.py"
-            # Essayer de trouver le fichier correspondant
-            file_path = None
+            file_path = self._path_cache.get(module_name)
+            if file_path is None:
+                file_path = self._resolve_source_path(module_name)
+                self._path_cache[module_name] = file_path or _NOT_FOUND
             
-            # 1. Essayer directement si c'est un chemin absolu
-            if os.path.exists(module_name):
-                file_path = module_name
-            # 2. Essayer avec project_path si disponible
-            elif self.project_path:
-                candidate = self.project_path / module_name
-                if candidate.exists():
-                    file_path = str(candidate)
-            # 3. Chercher dans module_to_file par correspondance partielle
-            if not file_path:
-                for node_name, node_file in self.module_to_file.items():
-                    if module_name in node_file or node_file.endswith(module_name):
-                        file_path = node_file
-                        break
-            
-            if not file_path or not os.path.exists(file_path):
+            if file_path is _NOT_FOUND or not file_path:
                 return ""  # Retourner vide au lieu d'un message d'erreur
             
-            # Utiliser le cache pour éviter de relire le même fichier
-            if file_path not in self._file_cache:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self._file_cache[file_path] = f.readlines()
-            
-            lines = self._file_cache[file_path]
-            
             # Extraire les lignes avec contexte
             start_line = max(0, line_number - context_lines - 1)
-            end_line = min(len(lines), line_number + context_lines)
+            end_line = line_number + context_lines
+            
+            if os.path.getsize(file_path) >= MMAP_THRESHOLD:
+                # Gros fichier (code généré, vendored...) : ne lire que la fenêtre utile
+                snippet_lines = _read_lines(file_path, start_line, end_line)
+            else:
+                # linecache garde le fichier en cache pour les snippets suivants
+                snippet_lines = [linecache.getline(file_path, i) for i in range(start_line + 1, end_line + 1)]
+                self._touch_snippet_file(file_path)
             
-            snippet_lines = lines[start_line:end_line]
             return ''.join(snippet_lines).strip()
         
         except Exception as e:
             return ""  # Retourner vide en cas d'erreur
     
+    def _touch_snippet_file(self, file_path: str):
+        """Marque un fichier comme récent et libère le plus ancien au-delà de SNIPPET_CACHE_SIZE"""
+        if file_path in self._snippet_files:
+            self._snippet_files.move_to_end(file_path)
+            return
+        
+        self._snippet_files[file_path] = True
+        if len(self._snippet_files) > SNIPPET_CACHE_SIZE:
+            oldest, _ = self._snippet_files.popitem(last=False)
+            linecache.cache.pop(oldest, None)
+    
+    def _release_snippet_files(self):
+        """Retire de linecache tous les fichiers chargés pour les snippets"""
+        while self._snippet_files:
+            file_path, _ = self._snippet_files.popitem()
+            linecache.cache.pop(file_path, None)
+    
+    def _resolve_source_path(self, module_name: str):
+        """Retrouve le fichier source d'un module (None si introuvable)"""
+        # module_name peut être un chemin relatif comme "src/mymodule.py" ou "Word_Jumble/word_jumble.py"
+        # Essayer de trouver le fichier correspondant
+        file_path = None
+        
+        # 1. Essayer directement si c'est un chemin absolu
+        if os.path.exists(module_name):
+            file_path = module_name
+        # 2. Essayer avec project_path si disponible
+        elif self.project_path:
+            candidate = self.project_path / module_name
+            if candidate.exists():
+                file_path = str(candidate)
+        # 3. Chercher dans module_to_file par correspondance partielle
+        if not file_path:
+            for node_name, node_file in self.module_to_file.items():
+                if module_name in node_file or node_file.endswith(module_name):
+                    file_path = node_file
+                    break
+        
+        if not file_path or not os.path.exists(file_path):
+            return None
+        return file_path
+    
     def _generate_cycles_section(self):
         """Génère la section des cycles"""
         if self.graph_info['is_dag']:
@@ -1043,9 +1297,27 @@ class HTMLReporter:
         
         cycles = []
         try:
-            cycles_found = list(nx.simple_cycles(self.graph))[:5]
+            # Seules les composantes fortement connexes de taille >= 2 contiennent
+            # des cycles : le reste du graphe (DAG) n'est jamais parcouru.
+            # find_cycle est linéaire : on extrait un cycle, on casse une de ses
+            # arêtes et on recommence (simple_cycles énumère tous les circuits)
+            cycles_found = []
+            for component in nx.strongly_connected_components(self.graph):
+                if len(component) < 2:
+                    continue
+                remaining = self.graph.subgraph(component).copy()
+                while len(cycles_found) < 5:
+                    try:
+                        edges = nx.find_cycle(remaining, orientation='original')
+                    except nx.NetworkXNoCycle:
+                        break
+                    cycles_found.append([u for u, v, *_ in edges])
+                    remaining.remove_edge(edges[0][0], edges[0][1])
+                if len(cycles_found) >= 5:
+                    break
+            
             for i, cycle in enumerate(cycles_found, 1):
-                cycle_str = ' → '.join(cycle) + f' → {cycle[0]}'
+                cycle_str = ' → '.join(_esc(node) for node in cycle) + f' → {_esc(cycle[0])}'
                 cycles.append(f'<li><strong>Cycle {i}:</strong> {cycle_str}</li>')
         except:
             pass
@@ -1066,13 +1338,4 @@ class HTMLReporter:
     
     def _get_top_modules(self, metric: str, top_n: int = 10) -> list:
         """Récupère les top modules pour une métrique donnée"""
-        if metric not in self.metrics:
-            return []
-        
-        sorted_modules = sorted(
-            self.metrics[metric].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        
-        return sorted_modules[:top_n]
+        return self._sorted_metrics.get(metric, [])[:top_n]
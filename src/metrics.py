@@ -7,6 +7,10 @@ import networkx as nx
 from typing import Dict
 
 
+# Au-delà de ce nombre de nœuds, l'intermédiarité est estimée par échantillonnage
+BETWEENNESS_SAMPLE_SIZE = 500
+
+
 class MetricsCalculator:
     """Calcule différentes métriques sur le graphe de dépendances"""
     
@@ -18,26 +22,44 @@ class MetricsCalculator:
             graph: Graphe de dépendances NetworkX
         """
         self.graph = graph
+        self._all_metrics = None
+        self._sorted_metrics = {}
     
     def degree_centrality(self) -> Dict[str, float]:
         """
         Calcule la centralité de degré
         Identifie les modules les plus connectés
         
+        Les valeurs restent normalisées par (n - 1) : la surface d'attaque et le
+        graphe interactif utilisent des seuils absolus sur cette centralité.
+        
         Returns:
             Dictionnaire {module: centralité}
         """
-        return nx.degree_centrality(self.graph)
+        n = self.graph.number_of_nodes()
+        if n <= 1:
+            return {node: 1.0 for node in self.graph}
+        
+        # Une seule itération sur les degrés, facteur de normalisation calculé une fois
+        scale = 1.0 / (n - 1)
+        return {node: degree * scale for node, degree in self.graph.degree()}
     
     def betweenness_centrality(self) -> Dict[str, float]:
         """
         Calcule la centralité d'intermédiarité
         Identifie les modules "pont" critiques
         
+        Au-delà de BETWEENNESS_SAMPLE_SIZE nœuds, le calcul exact (Brandes, O(V·E))
+        est remplacé par une approximation sur k nœuds pivots tirés au hasard
+        (graine fixe pour des résultats reproductibles). L'erreur reste faible
+        pour un classement des modules les plus critiques.
+        
         Returns:
             Dictionnaire {module: centralité}
         """
-        return nx.betweenness_centrality(self.graph)
+        n = self.graph.number_of_nodes()
+        k = None if n <= BETWEENNESS_SAMPLE_SIZE else BETWEENNESS_SAMPLE_SIZE
+        return nx.betweenness_centrality(self.graph, k=k, seed=42)
     
     def in_degree(self) -> Dict[str, int]:
         """
@@ -62,18 +84,21 @@ class MetricsCalculator:
     def calculate_all_metrics(self) -> Dict[str, Dict[str, float]]:
         """
         Calcule toutes les métriques
+        Le résultat est mis en cache : la centralité d'intermédiarité (O(V·E))
+        n'est calculée qu'une seule fois par instance
         
         Returns:
             Dictionnaire avec toutes les métriques
         """
-        metrics = {
-            "degree_centrality": self.degree_centrality(),
-            "betweenness_centrality": self.betweenness_centrality(),
-            "in_degree": self.in_degree(),
-            "out_degree": self.out_degree()
-        }
+        if self._all_metrics is None:
+            self._all_metrics = {
+                "degree_centrality": self.degree_centrality(),
+                "betweenness_centrality": self.betweenness_centrality(),
+                "in_degree": self.in_degree(),
+                "out_degree": self.out_degree()
+            }
         
-        return metrics
+        return self._all_metrics
     
     def get_top_modules(self, metric: str = "degree_centrality", top_n: int = 5) -> list:
         """
@@ -91,10 +116,12 @@ class MetricsCalculator:
         if metric not in all_metrics:
             return []
         
-        sorted_modules = sorted(
-            all_metrics[metric].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
+        # Le tri n'est fait qu'une fois par métrique, les appels suivants ne font que découper
+        if metric not in self._sorted_metrics:
+            self._sorted_metrics[metric] = sorted(
+                all_metrics[metric].items(),
+                key=lambda x: x[1],
+                reverse=True
+            )
         
-        return sorted_modules[:top_n]
+        return self._sorted_metrics[metric][:top_n]
@@ -5,24 +5,153 @@ Parse les fichiers Python et extrait les dépendances
 
 import ast
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Set, Tuple
+from src.cache import CACHE_DIR, file_digest, load_cache, save_cache
+
+
+# Fichier (dans le dossier de cache) des imports extraits, indexé par contenu de fichier
+IMPORTS_CACHE = 'imports.json'
+
+# Version de l'extraction des imports : à incrémenter quand elle change, pour
+# ne pas reprendre d'anciens résultats
+IMPORTS_CACHE_VERSION = 2
+
+# Nombre maximal de fichiers conservés dans le cache (les moins récents sont évincés)
+IMPORTS_CACHE_SIZE = 20000
+
+# En dessous de ce nombre de fichiers, le démarrage des processus coûte plus qu'il ne rapporte
+PARALLEL_THRESHOLD = 50
+
+
+# Dossiers ignorés lors de la recherche des fichiers Python (dépendances, builds...)
+SKIP_DIRS = frozenset({'.git', 'node_modules', '__pycache__', 'venv', '.venv', 'dist', 'build'})
+
+
+def iter_python_files(root) -> Iterator[str]:
+    """
+    Parcourt récursivement un dossier et retourne les fichiers .py
+    
+    Basé sur os.scandir (pas d'objet Path ni de stat supplémentaire par entrée)
+    et élague les dossiers de SKIP_DIRS.
+    
+    Args:
+        root: Dossier racine
+        
+    Yields:
+        Chemins (str) des fichiers Python
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return
+    
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in SKIP_DIRS:
+                yield from iter_python_files(entry.path)
+        elif entry.name.endswith('.py') and entry.is_file():
+            yield entry.path
+
+
+# Mot-clé import/from en début d'instruction (début de ligne, après ";" ou ":")
+_IMPORT_STMT_RE = re.compile(rb'(?:^|[;:])(?:\xef\xbb\xbf)?[ \t\f]*(?:import|from)\b', re.MULTILINE)
+
+
+# Champs des nœuds AST qui contiennent des listes d'instructions
+_STATEMENT_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+class _ImportCollector(ast.NodeVisitor):
+    """
+    Collecte les imports d'un AST en ne parcourant que les instructions
+    
+    Un import est toujours une instruction : les sous-arbres d'expressions
+    (la majorité des nœuds d'un fichier) ne sont jamais visités.
+    """
+    
+    def __init__(self):
+        self.imports: Set[str] = set()
+    
+    def visit_Import(self, node: ast.Import):
+        self.imports.update(alias.name for alias in node.names)
+    
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module:
+            self.imports.add(node.module)
+    
+    def generic_visit(self, node: ast.AST):
+        for field in _STATEMENT_FIELDS:
+            children = getattr(node, field, None)
+            if isinstance(children, list):
+                for child in children:
+                    self.visit(child)
+
+
+def _parse_imports(file_path: str) -> Set[str]:
+    """
+    Parse un fichier Python et extrait ses imports
+    
+    Fonction de module (et non méthode) pour pouvoir être exécutée
+    dans un processus séparé.
+    
+    Args:
+        file_path: Chemin du fichier à parser
+        
+    Returns:
+        Ensemble des modules importés
+    """
+    imports = set()
+    
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        
+        # Pré-filtre : sans instruction d'import possible, inutile de construire
+        # l'AST (le mot "import" seul apparaît aussi dans les docstrings, "important"...)
+        if b'import' not in data or not _IMPORT_STMT_RE.search(data):
+            return imports
+        
+        # ast.parse accepte directement les octets (et respecte l'encodage déclaré) ;
+        # les commentaires de type sont inutiles pour extraire les imports
+        tree = ast.parse(data, filename=str(file_path), type_comments=False)
+        
+        collector = _ImportCollector()
+        collector.visit(tree)
+        imports = collector.imports
+    
+    except Exception as e:
+        print(f"⚠️  Erreur lors du parsing de {file_path}: {e}")
+    
+    return imports
+
+
+def _parse_file_worker(entry: Tuple[str, str]) -> Tuple[str, Set[str]]:
+    """Parse un fichier pour le pool de processus : (chemin, module) -> (module, imports)"""
+    file_path, module_name = entry
+    return module_name, _parse_imports(file_path)
 
 
 class CodeParser:
     """Analyse les fichiers Python et extrait les imports et dépendances"""
     
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, cache_dir=CACHE_DIR):
         """
         Initialise le parser
         
         Args:
             project_path: Chemin vers le projet à analyser
+            cache_dir: Dossier du cache disque des imports
         """
         self.project_path = Path(project_path)
+        self._cache_path = Path(cache_dir) / IMPORTS_CACHE
         self.dependencies: Dict[str, Set[str]] = {}
         self.external_dependencies: Dict[str, Set[str]] = {}
         self.all_modules: Set[str] = set()
+        self._imports_cache: Dict[str, dict] = load_cache(self._cache_path, IMPORTS_CACHE_VERSION)
     
     def parse_file(self, file_path: Path) -> Set[str]:
         """
@@ -34,48 +163,75 @@ class CodeParser:
         Returns:
             Ensemble des modules importés
         """
-        imports = set()
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                tree = ast.parse(f.read(), filename=str(file_path))
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        imports.add(alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        imports.add(node.module)
-        
-        except Exception as e:
-            print(f"⚠️  Erreur lors du parsing de {file_path}: {e}")
-        
-        return imports
+        return _parse_imports(file_path)
     
-    def parse_project(self) -> Dict[str, Set[str]]:
+    def parse_project(self, parallel: bool = True) -> Dict[str, Set[str]]:
         """
         Parse tous les fichiers Python du projet
         
+        Args:
+            parallel: Répartir le parsing sur plusieurs processus au-delà de
+                PARALLEL_THRESHOLD fichiers (impossible depuis un processus démon)
+        
         Returns:
             Dictionnaire {fichier: ensemble_des_imports}
         """
-        python_files = list(self.project_path.rglob("*.py"))
+        python_files = list(iter_python_files(self.project_path))
         print(f"   📁 Chemin projet : {self.project_path}")
         print(f"   📄 Fichiers trouvés : {len(python_files)}")
         
+        # Chemins relatifs calculés une seule fois pour les deux passages
+        project_root = str(self.project_path)
+        entries = [(file_path, os.path.relpath(file_path, project_root)) for file_path in python_files]
+        
         # Premier passage : collecter tous les modules du projet
-        for file_path in python_files:
-            module_name = str(file_path.relative_to(self.project_path))
+        for file_path, module_name in entries:
             self.all_modules.add(module_name.replace('.py', ''))
             if module_name.endswith('/__init__.py'):
                 package_name = module_name.replace('/__init__.py', '')
                 self.all_modules.add(package_name)
         
-        # Second passage : parser les imports
-        for file_path in python_files:
-            module_name = str(file_path.relative_to(self.project_path))
-            imports = self.parse_file(file_path)
+        # Second passage : parser les imports des fichiers modifiés depuis la
+        # dernière exécution (en parallèle sur les gros projets)
+        keys = {}
+        known = {}
+        to_parse = []
+        for file_path, module_name in entries:
+            try:
+                key = file_digest(file_path)
+            except OSError:
+                key = None
+            keys[module_name] = key
+            cached = self._imports_cache.pop(key, None)
+            if cached is None:
+                to_parse.append((file_path, module_name))
+            else:
+                # Réinsertion en fin de dictionnaire : entrée la plus récente (LRU)
+                self._imports_cache[key] = cached
+                known[module_name] = set(cached['imports'])
+        
+        if not parallel or len(to_parse) < PARALLEL_THRESHOLD:
+            parsed = dict(map(_parse_file_worker, to_parse))
+        else:
+            with ProcessPoolExecutor() as executor:
+                parsed = dict(executor.map(_parse_file_worker, to_parse, chunksize=16))
+        
+        for module_name, imports in parsed.items():
+            key = keys[module_name]
+            if key:
+                self._imports_cache[key] = {'imports': sorted(imports)}
+        known.update(parsed)
+        if to_parse:
+            save_cache(self._cache_path, IMPORTS_CACHE_VERSION, self._imports_cache, IMPORTS_CACHE_SIZE)
+        print(f"   ♻️  Fichiers inchangés (cache) : {len(entries) - len(to_parse)}")
+        
+        # Noms internes pour une classification en O(1) : chemins des modules
+        # et leur dernier segment (ex: "app/models" -> "models")
+        internal_names = self.all_modules | {mod.split('/')[-1] for mod in self.all_modules}
+        
+        for file_path, module_name in entries:
+            imports = known[module_name]
+            
             self.dependencies[module_name] = imports
             
             # Séparer imports internes vs externes
@@ -84,11 +240,7 @@ class CodeParser:
             
             for imp in imports:
                 # Vérifier si c'est un module interne
-                is_internal = False
-                for mod in self.all_modules:
-                    if imp == mod or imp.split('.')[0] == mod or imp.split('.')[0] == mod.split('/')[-1]:
-                        is_internal = True
-                        break
+                is_internal = imp in self.all_modules or imp.split('.', 1)[0] in internal_names
                 
                 if is_internal:
                     internal.add(imp)
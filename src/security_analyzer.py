@@ -4,8 +4,29 @@ Identifie les patterns de code risqués et vulnérabilités potentielles
 """
 
 import ast
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Set, Tuple
 from pathlib import Path
+from src.cache import CACHE_DIR, file_digest, load_cache, save_cache
+
+
+# Fichier (dans le dossier de cache) des vulnérabilités détectées, indexé par
+# module et contenu de fichier
+SECURITY_CACHE = 'security.json'
+
+# Version des détecteurs : à incrémenter quand un contrôle change, pour ne pas
+# reprendre d'anciens résultats (les tables de règles sont prises en compte
+# automatiquement dans la version du cache, voir _cache_version)
+SECURITY_ANALYZER_VERSION = 2
+
+# Nombre maximal de fichiers conservés dans le cache (les moins récents sont évincés)
+SECURITY_CACHE_SIZE = 20000
+
+
+# En dessous de ce nombre de fichiers, le démarrage des processus coûte plus qu'il ne rapporte
+PARALLEL_THRESHOLD = 50
 
 
 # Base de données des fonctions dangereuses
@@ -39,6 +60,102 @@ SQL_EXECUTION_FUNCTIONS = {
 }
 
 
+def _cache_version() -> str:
+    """Version du cache : version des détecteurs et empreinte des tables de règles"""
+    rules = json.dumps([DANGEROUS_FUNCTIONS, DANGEROUS_MODULES, SQL_EXECUTION_FUNCTIONS], sort_keys=True)
+    return f"{SECURITY_ANALYZER_VERSION}-{hashlib.blake2b(rules.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+def _severity_of(description: str) -> str:
+    """Extrait le niveau de sévérité de la description"""
+    if '🔴' in description:
+        return '🔴 CRITIQUE'
+    elif '🟠' in description:
+        return '🟠 ÉLEVÉ'
+    elif '🟡' in description:
+        return '🟡 MOYEN'
+    return '🟢 FAIBLE'
+
+
+def _build_needles() -> Tuple[bytes, ...]:
+    """
+    Construit les motifs du pré-filtre de analyze_file
+    
+    Un fichier ne peut donner lieu à une détection que s'il contient au moins
+    un de ces motifs : le plus long segment de chaque fonction dangereuse, les
+    modules dangereux, les fonctions SQL et "shell" (pour shell=True). Les
+    motifs contenant déjà un motif plus court sont supprimés ("execute"
+    est couvert par "exec").
+    """
+    words = {max(name.split('.'), key=len) for name in DANGEROUS_FUNCTIONS}
+    words |= set(DANGEROUS_MODULES) | set(SQL_EXECUTION_FUNCTIONS) | {'shell'}
+    needles = [word for word in words if not any(other != word and other in word for other in words)]
+    return tuple(sorted(needle.encode('ascii') for needle in needles))
+
+
+# Motifs recherchés dans les octets du fichier avant de construire l'AST
+_NEEDLES = _build_needles()
+
+
+def _has_needle(data: bytes) -> bool:
+    """
+    Indique si le source contient au moins un motif du pré-filtre
+    
+    Chaque motif est cherché directement dans les octets (recherche de
+    sous-chaîne en C, sans décodage ni copie du source) : le coût reste dominé
+    par la lecture du fichier et ast.parse.
+    """
+    return any(needle in data for needle in _NEEDLES)
+
+# Table précalculée {fonction: (sévérité, description)} : la sévérité n'est
+# plus extraite de la description à chaque appel détecté
+_FUNC_TABLE = {name: (_severity_of(desc), desc) for name, desc in DANGEROUS_FUNCTIONS.items()}
+
+# Ensembles de noms pour les tests d'appartenance (la description n'est lue qu'en cas de détection)
+_DANGEROUS_MODULE_NAMES = frozenset(DANGEROUS_MODULES)
+_SQL_FUNCTION_NAMES = frozenset(SQL_EXECUTION_FUNCTIONS)
+
+
+class _SecurityVisitor(ast.NodeVisitor):
+    """Parcourt un AST et collecte les appels et imports dangereux"""
+    
+    def __init__(self, analyzer: 'SecurityAnalyzer', module_name: str):
+        self.vulnerabilities: List[Dict] = []
+        self.module_name = module_name
+        self._check_function_call = analyzer._check_function_call
+    
+    def visit_Call(self, node: ast.Call):
+        # Détection d'appels de fonctions
+        vuln = self._check_function_call(node, self.module_name)
+        if vuln:
+            self.vulnerabilities.append(vuln)
+        self.generic_visit(node)
+    
+    def visit_Import(self, node: ast.Import):
+        # Détection d'imports dangereux
+        for alias in node.names:
+            if alias.name in _DANGEROUS_MODULE_NAMES:
+                self.vulnerabilities.append({
+                    'type': 'dangerous_import',
+                    'module': self.module_name,
+                    'line': node.lineno,
+                    'function': alias.name,
+                    'severity': '🟠 ÉLEVÉ',
+                    'description': f'Import de module dangereux: {DANGEROUS_MODULES[alias.name]}'
+                })
+    
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module and node.module in _DANGEROUS_MODULE_NAMES:
+            self.vulnerabilities.append({
+                'type': 'dangerous_import',
+                'module': self.module_name,
+                'line': node.lineno,
+                'function': node.module,
+                'severity': '🟠 ÉLEVÉ',
+                'description': f'Import de module dangereux: {DANGEROUS_MODULES[node.module]}'
+            })
+
+
 class SecurityAnalyzer:
     """Analyse les fichiers Python pour détecter les vulnérabilités"""
     
@@ -61,44 +178,91 @@ class SecurityAnalyzer:
         vulnerabilities = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                tree = ast.parse(f.read(), filename=str(file_path))
+            with open(file_path, 'rb') as f:
+                data = f.read()
             
-            # Analyser les appels de fonction
-            for node in ast.walk(tree):
-                # Détection d'appels de fonctions
-                if isinstance(node, ast.Call):
-                    vuln = self._check_function_call(node, module_name)
-                    if vuln:
-                        vulnerabilities.append(vuln)
-                
-                # Détection d'imports dangereux
-                elif isinstance(node, ast.Import):
-                    for alias in node.names:
-                        if alias.name in DANGEROUS_MODULES:
-                            vulnerabilities.append({
-                                'type': 'dangerous_import',
-                                'module': module_name,
-                                'line': node.lineno,
-                                'function': alias.name,
-                                'severity': '🟠 ÉLEVÉ',
-                                'description': f'Import de module dangereux: {DANGEROUS_MODULES[alias.name]}'
-                            })
-                
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module and node.module in DANGEROUS_MODULES:
-                        vulnerabilities.append({
-                            'type': 'dangerous_import',
-                            'module': module_name,
-                            'line': node.lineno,
-                            'function': node.module,
-                            'severity': '🟠 ÉLEVÉ',
-                            'description': f'Import de module dangereux: {DANGEROUS_MODULES[node.module]}'
-                        })
+            # Pré-filtre : sans aucun nom dangereux dans le source, inutile de parser
+            if not _has_needle(data):
+                return vulnerabilities
+            
+            tree = ast.parse(data.decode('utf-8'), filename=str(file_path))
+            
+            # Un seul parcours de l'arbre, la distribution par type de nœud
+            # étant faite par le visiteur (plus de cascade d'isinstance)
+            visitor = _SecurityVisitor(self, module_name)
+            visitor.visit(tree)
+            vulnerabilities = visitor.vulnerabilities
         
         except Exception as e:
             pass
         
+        self._merge(module_name, vulnerabilities)
+        return vulnerabilities
+    
+    def analyze_files(self, entries: List[Tuple[Path, str]], cache_dir=CACHE_DIR,
+                      parallel: bool = True) -> Dict[str, List[Dict]]:
+        """
+        Analyse plusieurs fichiers, en parallèle sur les gros projets
+        
+        L'analyse d'un fichier (ast.parse + parcours) est purement CPU et
+        indépendante des autres : elle est répartie sur plusieurs processus
+        au-delà de PARALLEL_THRESHOLD fichiers. Les fichiers dont le contenu n'a
+        pas changé (pour les mêmes règles) sont repris du cache disque.
+        
+        Args:
+            entries: Liste de tuples (chemin_du_fichier, nom_du_module)
+            cache_dir: Dossier du cache disque des vulnérabilités
+            parallel: Autoriser la répartition sur plusieurs processus
+                (impossible depuis un processus démon)
+            
+        Returns:
+            Dictionnaire {module: vulnérabilités}
+        """
+        # Les fichiers inchangés depuis la dernière exécution sont repris du cache disque
+        cache_version = _cache_version()
+        cache_path = Path(cache_dir) / SECURITY_CACHE
+        cache = load_cache(cache_path, cache_version)
+        results = {}
+        keys = {}
+        to_analyze = []
+        for file_path, module_name in entries:
+            # Les vulnérabilités portent le nom du module : il fait partie de la clé
+            try:
+                key = file_digest(file_path, salt=module_name)
+            except OSError:
+                key = None
+            cached = cache.pop(key, None)
+            if cached is not None:
+                # Réinsertion en fin de dictionnaire : entrée la plus récente (LRU)
+                cache[key] = cached
+                results[module_name] = cached['vulnerabilities']
+            else:
+                keys[module_name] = key
+                to_analyze.append((file_path, module_name))
+        
+        if not parallel or len(to_analyze) < PARALLEL_THRESHOLD:
+            analyzed = list(map(_analyze_one, to_analyze))
+        else:
+            with ProcessPoolExecutor() as executor:
+                analyzed = list(executor.map(_analyze_one, to_analyze, chunksize=16))
+        
+        for module_name, vulnerabilities in analyzed:
+            results[module_name] = vulnerabilities
+            key = keys[module_name]
+            if key:
+                cache[key] = {'vulnerabilities': vulnerabilities}
+        
+        for _, module_name in entries:
+            self._merge(module_name, results[module_name])
+        
+        if entries:
+            save_cache(cache_path, cache_version, cache, SECURITY_CACHE_SIZE)
+        print(f"   ♻️  Fichiers inchangés (cache) : {len(entries) - len(to_analyze)}")
+        
+        return self.vulnerabilities
+    
+    def _merge(self, module_name: str, vulnerabilities: List[Dict]):
+        """Enregistre les vulnérabilités d'un module analysé"""
         if vulnerabilities:
             self.vulnerabilities[module_name] = vulnerabilities
             
@@ -107,55 +271,81 @@ class SecurityAnalyzer:
             for vuln in vulnerabilities:
                 dangerous_funcs.add(vuln['function'])
             self.dangerous_modules[module_name] = dangerous_funcs
-        
-        return vulnerabilities
     
     def _check_function_call(self, node: ast.Call, module_name: str) -> dict:
         """Vérifie si un appel de fonction est dangereux"""
+        # Distribution par nom terminal : seuls les contrôles associés à ce nom
+        # sont exécutés (le nom pointé complet n'est construit qu'en cas de besoin)
+        func = node.func
+        if isinstance(func, ast.Attribute):
+            tail = func.attr
+        elif isinstance(func, ast.Name):
+            tail = func.id
+        else:
+            return None
+        
+        handlers = _HANDLERS.get(tail, ())
+        if any(keyword.arg == 'shell' for keyword in node.keywords):
+            handlers += (SecurityAnalyzer._match_shell_true,)
+        if not handlers:
+            return None
+        
         func_name = self._get_function_name(node)
         
         if not func_name:
             return None
         
-        # Vérifier les fonctions dangereuses
-        if func_name in DANGEROUS_FUNCTIONS:
-            return {
-                'type': 'dangerous_function',
-                'module': module_name,
-                'line': node.lineno,
-                'function': func_name,
-                'severity': self._get_severity(DANGEROUS_FUNCTIONS[func_name]),
-                'description': DANGEROUS_FUNCTIONS[func_name]
-            }
-        
-        # Vérifier les fonctions SQL
-        simple_name = func_name.split('.')[-1]
-        if simple_name in SQL_EXECUTION_FUNCTIONS:
-            # Vérifier si c'est une f-string ou concaténation (signe d'injection)
-            if self._has_string_formatting(node):
-                return {
-                    'type': 'sql_injection',
-                    'module': module_name,
-                    'line': node.lineno,
-                    'function': func_name,
-                    'severity': '🔴 CRITIQUE',
-                    'description': f'Risque d\'injection SQL - Utilisation de formatage de chaîne avec {simple_name}'
-                }
-        
-        # Vérifier subprocess avec shell=True
-        if 'subprocess' in func_name:
-            if self._has_shell_true(node):
-                return {
-                    'type': 'command_injection',
-                    'module': module_name,
-                    'line': node.lineno,
-                    'function': func_name,
-                    'severity': '🔴 CRITIQUE',
-                    'description': 'subprocess avec shell=True - Risque d\'injection de commande'
-                }
+        for handler in handlers:
+            vuln = handler(self, node, module_name, func_name, tail)
+            if vuln:
+                return vuln
         
         return None
     
+    def _match_dangerous_function(self, node: ast.Call, module_name: str, func_name: str, tail: str) -> dict:
+        """Vérifie les fonctions dangereuses"""
+        entry = _FUNC_TABLE.get(func_name)
+        if entry is None:
+            return None
+        
+        severity, description = entry
+        return {
+            'type': 'dangerous_function',
+            'module': module_name,
+            'line': node.lineno,
+            'function': func_name,
+            'severity': severity,
+            'description': description
+        }
+    
+    def _match_sql_formatting(self, node: ast.Call, module_name: str, func_name: str, tail: str) -> dict:
+        """Vérifie les fonctions SQL appelées avec une f-string ou une concaténation (signe d'injection)"""
+        if not self._has_string_formatting(node):
+            return None
+        
+        return {
+            'type': 'sql_injection',
+            'module': module_name,
+            'line': node.lineno,
+            'function': func_name,
+            'severity': '🔴 CRITIQUE',
+            'description': f'Risque d\'injection SQL - Utilisation de formatage de chaîne avec {tail}'
+        }
+    
+    def _match_shell_true(self, node: ast.Call, module_name: str, func_name: str, tail: str) -> dict:
+        """Vérifie subprocess avec shell=True"""
+        if 'subprocess' not in func_name or not self._has_shell_true(node):
+            return None
+        
+        return {
+            'type': 'command_injection',
+            'module': module_name,
+            'line': node.lineno,
+            'function': func_name,
+            'severity': '🔴 CRITIQUE',
+            'description': 'subprocess avec shell=True - Risque d\'injection de commande'
+        }
+    
     def _get_function_name(self, node: ast.Call) -> str:
         """Extrait le nom complet d'une fonction"""
         if isinstance(node.func, ast.Name):
@@ -171,26 +361,24 @@ class SecurityAnalyzer:
             return '.'.join(reversed(parts))
         return None
     
-    def _get_severity(self, description: str) -> str:
-        """Extrait le niveau de sévérité de la description"""
-        if '🔴' in description:
-            return '🔴 CRITIQUE'
-        elif '🟠' in description:
-            return '🟠 ÉLEVÉ'
-        elif '🟡' in description:
-            return '🟡 MOYEN'
-        return '🟢 FAIBLE'
-    
     def _has_string_formatting(self, node: ast.Call) -> bool:
         """Détecte si l'appel utilise du formatage de chaîne"""
+        # Comparaisons d'identité sur les classes AST (pas de parcours du MRO)
         for arg in node.args:
-            if isinstance(arg, ast.JoinedStr):  # f-string
+            arg_type = type(arg)
+            if arg_type is ast.JoinedStr:  # f-string
                 return True
-            if isinstance(arg, ast.BinOp) and isinstance(arg.op, ast.Mod):  # % formatting
+            if arg_type is ast.BinOp and type(arg.op) is ast.Mod:  # % formatting
                 return True
-            if isinstance(arg, ast.Call):
-                func_name = self._get_function_name(arg)
-                if func_name and 'format' in func_name:  # .format()
+            if arg_type is ast.Call:  # .format()
+                # Équivaut à chercher "format" dans le nom pointé, segment par
+                # segment, sans construire la chaîne
+                func = arg.func
+                while type(func) is ast.Attribute:
+                    if 'format' in func.attr:
+                        return True
+                    func = func.value
+                if type(func) is ast.Name and 'format' in func.id:
                     return True
         return False
     
@@ -248,3 +436,37 @@ class SecurityAnalyzer:
         for module_vulns in self.vulnerabilities.values():
             all_vulns.extend(module_vulns)
         return all_vulns
+
+
+def _analyze_one(entry: Tuple[Path, str]) -> Tuple[str, List[Dict]]:
+    """
+    Analyse un fichier dans un processus de travail
+    
+    Args:
+        entry: Tuple (chemin_du_fichier, nom_du_module)
+        
+    Returns:
+        Tuple (nom_du_module, vulnérabilités)
+    """
+    file_path, module_name = entry
+    return module_name, SecurityAnalyzer().analyze_file(file_path, module_name)
+
+
+def _build_handlers() -> Dict[str, tuple]:
+    """
+    Construit la table {nom terminal: contrôles} utilisée par _check_function_call
+    
+    Le contrôle shell=True n'est pas indexé : il est ajouté à la volée pour
+    tout appel qui passe un argument shell=.
+    """
+    handlers = {}
+    for name in DANGEROUS_FUNCTIONS:
+        tail = name.rpartition('.')[2]
+        handlers.setdefault(tail, (SecurityAnalyzer._match_dangerous_function,))
+    for name in SQL_EXECUTION_FUNCTIONS:
+        handlers[name] = handlers.get(name, ()) + (SecurityAnalyzer._match_sql_formatting,)
+    return handlers
+
+
+# Contrôles à exécuter selon le dernier segment du nom de la fonction appelée
+_HANDLERS = _build_handlers()
@@ -4,9 +4,128 @@ Crée des représentations graphiques avec Matplotlib et PyVis (interactif)
 """
 
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 from typing import Optional
 from pyvis.network import Network
+from src.html_escape import esc
+
+
+# Résolution par défaut des PNG (aperçu écran ; passer dpi=300 pour l'impression)
+DEFAULT_DPI = 120
+
+# Au-delà de ce nombre de nœuds, le layout passe par graphviz sfdp (multiniveau, O(N log N))
+LAYOUT_SFDP_THRESHOLD = 500
+
+# Au-delà de ce nombre de nœuds, les étiquettes ne sont plus dessinées (illisibles et coûteuses)
+LABELS_MAX_NODES = 200
+
+
+def _draw_graph(graph: nx.DiGraph, pos: dict, ax, node_color, node_size, cmap=None):
+    """
+    Dessine un graphe avec un seul artiste par type de primitive
+    
+    nx.draw crée un artiste matplotlib par arête (FancyArrowPatch) : les arêtes
+    sont ici regroupées dans une LineCollection (le sens est indiqué par un
+    quiver, lui aussi vectorisé) et les nœuds dans un unique scatter.
+    
+    Args:
+        graph: Graphe à dessiner
+        pos: Positions {nœud: (x, y)}
+        ax: Axes matplotlib cible
+        node_color: Couleur unique ou liste de valeurs (avec cmap)
+        node_size: Taille unique ou liste de tailles
+        cmap: Colormap appliquée aux valeurs de node_color
+    """
+    nodes = list(graph.nodes())
+    if not nodes:
+        return
+    
+    offsets = np.array([pos[node] for node in nodes])
+    
+    edges = list(graph.edges())
+    if edges:
+        segs = np.array([[pos[u], pos[v]] for u, v in edges])
+        ax.add_collection(LineCollection(segs, colors='gray', alpha=0.7, linewidths=1, zorder=1))
+        
+        # Pointes de flèche au milieu des arêtes (sens de la dépendance),
+        # de longueur fixe relative à l'étendue du dessin
+        starts = segs[:, 0]
+        deltas = segs[:, 1] - starts
+        mids = starts + deltas * 0.5
+        lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+        lengths[lengths == 0] = 1
+        span = np.ptp(offsets, axis=0).max() or 1
+        arrows = deltas / lengths[:, None] * (span * 0.02)
+        ax.quiver(
+            mids[:, 0], mids[:, 1], arrows[:, 0], arrows[:, 1],
+            angles='xy', scale_units='xy', scale=1, color='gray', alpha=0.9,
+            width=0.0015, headwidth=5, headlength=6, headaxislength=5, pivot='middle', zorder=1
+        )
+    
+    ax.scatter(offsets[:, 0], offsets[:, 1], s=node_size, c=node_color, cmap=cmap, alpha=0.7, zorder=2)
+    
+    if len(nodes) < LABELS_MAX_NODES:
+        for node, (x, y) in zip(nodes, offsets):
+            ax.text(x, y, node, fontsize=8, fontweight='bold', ha='center', va='center', zorder=3)
+    
+    # En sortie vectorielle (PDF/SVG), les collections sont intégrées en bitmap
+    for collection in ax.collections:
+        collection.set_rasterized(True)
+    
+    ax.autoscale_view()
+    ax.set_axis_off()
+
+
+# Couleurs des nœuds du graphe interactif, indexées par intensité (0-255)
+BLUE_SHADES = [f'#{intensity:02x}{intensity:02x}ff' for intensity in range(256)]
+
+# Bloc "vulnérabilités" de l'info bulle des modules dangereux (graphe interactif)
+TOOLTIP_VULN_FMT = (
+    "<div style='margin-top: 8px; padding-top: 8px; border-top: 1px solid #444;'>"
+    "<b style='color: #ff3333;'>⚠️ {count} vulnérabilité{plural}</b></div>"
+)
+
+
+# CSS injecté dans le graphe interactif : plein écran, tooltips et boutons de navigation
+FULLSCREEN_CSS = '''
+            <style>
+                body {
+                    margin: 0;
+                    padding: 0;
+                    overflow: hidden;
+                }
+                #mynetwork {
+                    position: fixed;
+                    top: 0;
+                    left: 0;
+                    width: 100vw !important;
+                    height: 100vh !important;
+                }
+                /* Améliorer le style des tooltips */
+                .vis-tooltip {
+                    background-color: rgba(20, 20, 30, 0.95) !important;
+                    border: 2px solid #667eea !important;
+                    border-radius: 8px !important;
+                    padding: 12px 16px !important;
+                    font-family: Arial, sans-serif !important;
+                    font-size: 14px !important;
+                    color: #e0e0e0 !important;
+                    box-shadow: 0 4px 20px rgba(0, 0, 0, 0.5) !important;
+                    max-width: 350px !important;
+                    min-width: 250px !important;
+                }
+                /* Améliorer la visibilité des boutons de navigation */
+                .vis-button {
+                    background-color: #667eea !important;
+                    border: 2px solid #5568d3 !important;
+                }
+                .vis-button:hover {
+                    background-color: #5568d3 !important;
+                    box-shadow: 0 0 10px #667eea !important;
+                }
+            </style>'''
 
 
 class GraphVisualizer:
@@ -20,56 +139,119 @@ class GraphVisualizer:
             graph: Graphe NetworkX à visualiser
         """
         self.graph = graph
-        self.graph = graph
+        
+        # Dernier layout calculé et empreinte (nœuds, arêtes) du graphe correspondant
+        self._pos = None
+        self._pos_key = None
+        
+        # Figure réutilisée d'un dessin à l'autre (libérée par close())
+        self._fig = None
+    
+    def _get_axes(self, ax, figsize: tuple):
+        """
+        Retourne les axes sur lesquels dessiner
+        
+        Sans axes fournis, la figure interne est créée au premier appel puis
+        vidée et redimensionnée aux appels suivants (pas de nouvelle figure
+        ni de reconstruction du backend à chaque dessin).
+        
+        Args:
+            ax: Axes fournis par l'appelant (ou None)
+            figsize: Taille de la figure interne
+            
+        Returns:
+            Tuple (figure, axes)
+        """
+        if ax is not None:
+            return ax.figure, ax
+        
+        if self._fig is None:
+            self._fig = plt.figure(figsize=figsize)
+        else:
+            self._fig.clear()
+            self._fig.set_size_inches(figsize)
+        return self._fig, self._fig.add_subplot()
+    
+    def close(self):
+        """Libère la figure matplotlib réutilisée par les dessins"""
+        if self._fig is not None:
+            plt.close(self._fig)
+            self._fig = None
+    
+    def _layout(self) -> dict:
+        """
+        Retourne les positions spring_layout du graphe (calculées une seule fois)
+        
+        La graine fixe rend le layout déterministe : les différents dessins
+        partagent la même disposition. Seul le dernier layout est conservé, avec
+        l'ensemble des nœuds et des arêtes du graphe : un ajout, un retrait ou un
+        remplacement de nœud ou d'arête entre deux appels le fait recalculer.
+        
+        Au-delà de LAYOUT_SFDP_THRESHOLD nœuds, graphviz sfdp est utilisé s'il
+        est disponible ; sinon le nombre d'itérations de spring_layout est
+        réduit pour borner le temps de calcul.
+        
+        Returns:
+            Dictionnaire {nœud: (x, y)}
+        """
+        key = (frozenset(self.graph.nodes()), frozenset(self.graph.edges()))
+        if self._pos is None or key != self._pos_key:
+            self._pos = self._compute_layout()
+            self._pos_key = key
+        return self._pos
+    
+    def _compute_layout(self) -> dict:
+        """Calcule les positions des nœuds selon la taille du graphe"""
+        n = self.graph.number_of_nodes()
+        iterations = 50
+        
+        if n > LAYOUT_SFDP_THRESHOLD:
+            try:
+                return nx.nx_agraph.graphviz_layout(self.graph, prog='sfdp')
+            except (ImportError, OSError, ValueError):
+                pass  # pygraphviz ou graphviz absent : repli sur spring_layout
+            iterations = max(10, min(50, 20000 // n))
+        
+        return nx.spring_layout(self.graph, k=0.5, iterations=iterations, seed=0)
     
-    def draw_simple(self, output_file: Optional[str] = None):
+    def draw_simple(self, output_file: Optional[str] = None, dpi: int = DEFAULT_DPI, ax=None):
         """
         Dessine le graphe de manière simple
         
         Args:
             output_file: Chemin du fichier de sortie (None = affichage)
+            dpi: Résolution de l'image sauvegardée
+            ax: Axes matplotlib cibles (None = figure interne réutilisée)
         """
-        plt.figure(figsize=(12, 8))
+        fig, ax = self._get_axes(ax, (12, 8))
         
         # Layout pour positionner les nœuds
-        pos = nx.spring_layout(self.graph, k=0.5, iterations=50)
+        pos = self._layout()
         
         # Dessiner le graphe
-        nx.draw(
-            self.graph,
-            pos,
-            with_labels=True,
-            node_color='lightblue',
-            node_size=1500,
-            font_size=8,
-            font_weight='bold',
-            arrows=True,
-            arrowsize=20,
-            edge_color='gray',
-            alpha=0.7
-        )
+        _draw_graph(self.graph, pos, ax, node_color='lightblue', node_size=1500)
         
-        plt.title("Graphe de Dépendances", fontsize=16, fontweight='bold')
+        ax.set_title("Graphe de Dépendances", fontsize=16, fontweight='bold')
         
         if output_file:
-            plt.savefig(output_file, bbox_inches='tight', dpi=300)
+            fig.savefig(output_file, bbox_inches='tight', dpi=dpi)
             print(f"✅ Graphe sauvegardé : {output_file}")
         else:
             plt.show()
-        
-        plt.close()
     
-    def draw_with_metrics(self, metrics: dict, output_file: Optional[str] = None):
+    def draw_with_metrics(self, metrics: dict, output_file: Optional[str] = None, dpi: int = DEFAULT_DPI, ax=None):
         """
         Dessine le graphe avec coloration selon les métriques
         
         Args:
             metrics: Dictionnaire des métriques
             output_file: Chemin du fichier de sortie
+            dpi: Résolution de l'image sauvegardée
+            ax: Axes matplotlib cibles (None = figure interne réutilisée)
         """
-        fig, ax = plt.subplots(figsize=(14, 10))
+        fig, ax = self._get_axes(ax, (14, 10))
         
-        pos = nx.spring_layout(self.graph, k=0.5, iterations=50)
+        pos = self._layout()
         
         # Taille des nœuds selon la centralité
         if 'degree_centrality' in metrics:
@@ -86,21 +268,7 @@ class GraphVisualizer:
             node_colors = 'lightblue'
         
         # Dessiner
-        nx.draw(
-            self.graph,
-            pos,
-            with_labels=True,
-            node_color=node_colors,
-            node_size=node_sizes,
-            font_size=8,
-            font_weight='bold',
-            arrows=True,
-            arrowsize=20,
-            edge_color='gray',
-            alpha=0.7,
-            cmap=plt.cm.Blues,
-            ax=ax
-        )
+        _draw_graph(self.graph, pos, ax, node_color=node_colors, node_size=node_sizes, cmap=plt.cm.Blues)
         
         ax.set_title("Graphe de Dépendances (avec métriques)", fontsize=16, fontweight='bold')
         
@@ -114,51 +282,37 @@ class GraphVisualizer:
             fig.colorbar(sm, ax=ax, label='Degré entrant')
         
         if output_file:
-            plt.savefig(output_file, bbox_inches='tight', dpi=300)
+            fig.savefig(output_file, bbox_inches='tight', dpi=dpi)
             print(f"✅ Graphe avec métriques sauvegardé : {output_file}")
         else:
             plt.show()
-        
-        plt.close()
     
-    def draw_hierarchical(self, output_file: Optional[str] = None):
+    def draw_hierarchical(self, output_file: Optional[str] = None, dpi: int = DEFAULT_DPI, ax=None):
         """
         Dessine le graphe en disposition hiérarchique
         
         Args:
             output_file: Chemin du fichier de sortie
+            dpi: Résolution de l'image sauvegardée
+            ax: Axes matplotlib cibles (None = figure interne réutilisée)
         """
-        plt.figure(figsize=(14, 10))
+        fig, ax = self._get_axes(ax, (14, 10))
         
         # Layout hiérarchique (si le graphe est un DAG)
         if nx.is_directed_acyclic_graph(self.graph):
             pos = nx.nx_agraph.graphviz_layout(self.graph, prog='dot')
         else:
-            pos = nx.spring_layout(self.graph, k=0.5, iterations=50)
-        
-        nx.draw(
-            self.graph,
-            pos,
-            with_labels=True,
-            node_color='lightgreen',
-            node_size=1500,
-            font_size=8,
-            font_weight='bold',
-            arrows=True,
-            arrowsize=20,
-            edge_color='gray',
-            alpha=0.7
-        )
+            pos = self._layout()
+        
+        _draw_graph(self.graph, pos, ax, node_color='lightgreen', node_size=1500)
         
-        plt.title("Graphe Hiérarchique de Dépendances", fontsize=16, fontweight='bold')
+        ax.set_title("Graphe Hiérarchique de Dépendances", fontsize=16, fontweight='bold')
         
         if output_file:
-            plt.savefig(output_file, bbox_inches='tight', dpi=300)
+            fig.savefig(output_file, bbox_inches='tight', dpi=dpi)
             print(f"✅ Graphe hiérarchique sauvegardé : {output_file}")
         else:
             plt.show()
-        
-        plt.close()
     
     def draw_interactive(self, metrics: dict = None, output_file: str = "graph_interactive.html", security=None):
         """
@@ -175,7 +329,8 @@ class GraphVisualizer:
             width='100%',
             bgcolor="#1a1a1a",  # Fond plus sombre
             font_color="#e0e0e0",
-            directed=True
+            directed=True,
+            cdn_resources='in_line'  # vis-network intégré au fichier : lisible hors ligne, sans dossier lib/
         )
         
         # Configuration de la physique pour une meilleure visualisation
@@ -236,30 +391,40 @@ class GraphVisualizer:
         """)
         
         # Calculer les métriques pour la taille et couleur des nœuds
+        # (seules la centralité de degré et le degré entrant sont affichés)
         if metrics:
             degree_centrality = metrics.get('degree_centrality', {})
-            betweenness_centrality = metrics.get('betweenness_centrality', {})
             in_degree = metrics.get('in_degree', {})
-            out_degree = metrics.get('out_degree', {})
         else:
-            degree_centrality = nx.degree_centrality(self.graph)
-            betweenness_centrality = nx.betweenness_centrality(self.graph)
+            scale = 1.0 / max(1, self.graph.number_of_nodes() - 1)
+            degree_centrality = {node: degree * scale for node, degree in self.graph.degree()}
             in_degree = dict(self.graph.in_degree())
-            out_degree = dict(self.graph.out_degree())
         
         # Normaliser les valeurs pour les couleurs
         max_in_degree = max(in_degree.values()) if in_degree.values() else 1
         
+        # Construire directement les listes de nœuds et d'arêtes de PyVis :
+        # add_node/add_edge coûtent un appel par élément et add_edge vérifie
+        # l'existence des extrémités dans une liste (O(V) par arête)
+        nodes = []
+        
+        # Intensité du bleu de chaque nœud selon son degré entrant, calculée
+        # en une seule opération vectorisée
+        graph_nodes = list(self.graph.nodes())
+        if max_in_degree > 0:
+            in_array = np.fromiter((in_degree.get(node, 0) for node in graph_nodes), dtype=np.float64, count=len(graph_nodes))
+            intensities = (255 - (in_array / max_in_degree * 150)).astype(np.int64).tolist()
+        else:
+            intensities = [255] * len(graph_nodes)
+        
         # Ajouter les nœuds avec style amélioré
-        for node in self.graph.nodes():
+        for node, color_intensity in zip(graph_nodes, intensities):
             # Vérifier si le module est dangereux
             is_dangerous = security and security.is_module_dangerous(node)
             
             # Métriques
             centrality = degree_centrality.get(node, 0)
-            betweenness = betweenness_centrality.get(node, 0)
             in_deg = in_degree.get(node, 0)
-            out_deg = out_degree.get(node, 0)
             
             # Taille basée sur la centralité
             size = 25 + centrality * 120
@@ -269,95 +434,57 @@ class GraphVisualizer:
                 color = '#ff3333'  # Rouge vif pour modules dangereux
                 border_color = '#ff0000'
             else:
-                color_intensity = int(255 - (in_deg / max_in_degree * 150)) if max_in_degree > 0 else 255
-                color = f'#{color_intensity:02x}{color_intensity:02x}ff'
+                color = BLUE_SHADES[color_intensity]
                 border_color = '#4444ff'
             
+            # Vulnérabilités du module, intégrées directement dans l'info bulle
+            if is_dangerous:
+                vuln_count = len(security.get_module_vulnerabilities(node))
+                vuln_block = TOOLTIP_VULN_FMT.format(count=vuln_count, plural='s' if vuln_count > 1 else '')
+            else:
+                vuln_block = ''
+            
             # Info bulle simplifiée avec 2 métriques
             title = f"""<div>
-<div>{node}</div>
+<div>{esc(node)}</div>
 <div><b>Centralité:</b> {centrality:.3f}</div>
-<div><b>Dépendants:</b> {in_deg}</div>
+<div><b>Dépendants:</b> {in_deg}</div>{vuln_block}
 </div>"""
             
-            # Ajouter les vulnérabilités si présentes
-            if is_dangerous:
-                vulns = security.get_module_vulnerabilities(node)
-                vuln_info = f"<div style='margin-top: 8px; padding-top: 8px; border-top: 1px solid #444;'><b style='color: #ff3333;'>⚠️ {len(vulns)} vulnérabilité{'s' if len(vulns) > 1 else ''}</b></div>"
-                title = title.replace('</div>"""', vuln_info + '</div>"""')
-            
-            net.add_node(
-                node,
-                label=node.split('/')[-1],  # Afficher seulement le nom du fichier
-                title=title,
-                size=size,
-                color=color,
-                borderWidth=3,
-                borderWidthSelected=5,
-                font={'size': 16, 'color': 'rgba(255,255,255,0.9)', 'face': 'Arial'},
-                shadow={'enabled': True, 'size': 10}
-            )
+            # Mêmes options que Network.add_node (qui remplace la police par font_color)
+            nodes.append({
+                'id': node,
+                'label': node.split('/')[-1] or node,  # Afficher seulement le nom du fichier
+                'shape': 'dot',
+                'title': title,
+                'size': size,
+                'color': color,
+                'borderWidth': 3,
+                'borderWidthSelected': 5,
+                'font': {'color': net.font_color},
+                'shadow': {'enabled': True, 'size': 10}
+            })
+        
+        net.nodes = nodes
+        net.node_ids = [n['id'] for n in nodes]
+        net.node_map = {n['id']: n for n in nodes}
         
         # Ajouter les arêtes
-        for source, target in self.graph.edges():
-            net.add_edge(
-                source, 
-                target, 
-                color={'color': '#666666', 'highlight': '#667eea'},
-                width=2,
-                arrows={'to': {'enabled': True, 'scaleFactor': 0.8}}
-            )
-        
-        # Générer le fichier HTML
-        net.save_graph(output_file)
-        
-        # Modifier le HTML généré pour forcer le plein écran et améliorer les tooltips
-        with open(output_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        # Ajouter du CSS pour supprimer les marges, plein écran et styliser les tooltips
-        html_content = html_content.replace(
-            '<head>',
-            '''<head>
-            <style>
-                body {
-                    margin: 0;
-                    padding: 0;
-                    overflow: hidden;
-                }
-                #mynetwork {
-                    position: fixed;
-                    top: 0;
-                    left: 0;
-                    width: 100vw !important;
-                    height: 100vh !important;
-                }
-                /* Améliorer le style des tooltips */
-                .vis-tooltip {
-                    background-color: rgba(20, 20, 30, 0.95) !important;
-                    border: 2px solid #667eea !important;
-                    border-radius: 8px !important;
-                    padding: 12px 16px !important;
-                    font-family: Arial, sans-serif !important;
-                    font-size: 14px !important;
-                    color: #e0e0e0 !important;
-                    box-shadow: 0 4px 20px rgba(0, 0, 0, 0.5) !important;
-                    max-width: 350px !important;
-                    min-width: 250px !important;
-                }
-                /* Améliorer la visibilité des boutons de navigation */
-                .vis-button {
-                    background-color: #667eea !important;
-                    border: 2px solid #5568d3 !important;
-                }
-                .vis-button:hover {
-                    background-color: #5568d3 !important;
-                    box-shadow: 0 0 10px #667eea !important;
-                }
-            </style>'''
-        )
+        net.edges = [
+            {
+                'from': source,
+                'to': target,
+                'color': {'color': '#666666', 'highlight': '#667eea'},
+                'width': 2,
+                'arrows': {'to': {'enabled': True, 'scaleFactor': 0.8}}
+            }
+            for source, target in self.graph.edges()
+        ]
         
-        # Pas de modification supplémentaire du HTML
+        # Générer le HTML en mémoire, y injecter le CSS (plein écran, tooltips)
+        # et l'écrire une seule fois
+        html_content = net.generate_html(output_file)
+        html_content = html_content.replace('<head>', '<head>' + FULLSCREEN_CSS, 1)
         
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
@@ -0,0 +1,12 @@
+"""
+Configuration partagée des tests
+Rend importables les modules de src/ et l'application web (web_ui/app.py)
+"""
+
+import sys
+from pathlib import Path
+
+# Racine du projet : src.* comme dans main.py, app comme au lancement de web_ui
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'web_ui'))
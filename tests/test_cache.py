@@ -0,0 +1,63 @@
+"""
+Tests du cache disque partagé (src/cache.py)
+"""
+
+import json
+
+from src.cache import file_digest, load_cache, save_cache
+
+
+def test_round_trip(tmp_path):
+    """Les entrées écrites sont relues telles quelles avec la même version"""
+    cache_path = tmp_path / 'cache' / 'imports.json'
+    entries = {'a': {'imports': ['os']}, 'b': {'imports': []}}
+    
+    save_cache(cache_path, 2, dict(entries), max_entries=10)
+    
+    assert load_cache(cache_path, 2) == entries
+    assert not list(cache_path.parent.glob('*.tmp'))
+
+
+def test_version_change_invalidates(tmp_path):
+    """Un cache écrit par une autre version (format ou règles) est ignoré"""
+    cache_path = tmp_path / 'security.json'
+    save_cache(cache_path, '2-abc', {'a': {'vulns': []}}, max_entries=10)
+    
+    assert load_cache(cache_path, '2-def') == {}
+    assert load_cache(cache_path, 3) == {}
+
+
+def test_missing_or_corrupt_file(tmp_path):
+    """Un cache absent ou illisible équivaut à un cache vide"""
+    cache_path = tmp_path / 'imports.json'
+    assert load_cache(cache_path, 1) == {}
+    
+    cache_path.write_text('{tronqué', encoding='utf-8')
+    assert load_cache(cache_path, 1) == {}
+    
+    cache_path.write_text(json.dumps(['pas', 'un', 'dict']), encoding='utf-8')
+    assert load_cache(cache_path, 1) == {}
+
+
+def test_oldest_entries_evicted(tmp_path):
+    """Au-delà de max_entries, les entrées les moins récentes sont évincées"""
+    cache_path = tmp_path / 'imports.json'
+    entries = {str(i): {'n': i} for i in range(5)}
+    
+    save_cache(cache_path, 1, entries, max_entries=3)
+    
+    assert list(load_cache(cache_path, 1)) == ['2', '3', '4']
+
+
+def test_file_digest_depends_on_content_and_salt(tmp_path):
+    """La clé suit le contenu du fichier (pas son mtime) et le sel"""
+    a = tmp_path / 'a.py'
+    b = tmp_path / 'b.py'
+    a.write_bytes(b'import os\n')
+    b.write_bytes(b'import os\n')
+    
+    assert file_digest(a) == file_digest(b)
+    assert file_digest(a, salt='pkg.a') != file_digest(a, salt='pkg.b')
+    
+    b.write_bytes(b'import sys\n')
+    assert file_digest(a) != file_digest(b)
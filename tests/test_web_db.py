@@ -0,0 +1,152 @@
+"""
+Tests de la base SQLite de l'interface web (web_ui/app.py)
+Migration des anciennes bases et écritures via le thread écrivain
+"""
+
+import importlib
+import sqlite3
+import threading
+
+import pytest
+
+pytest.importorskip('flask')
+
+# Schéma d'avant la série (statut TEXT, message d'erreur en clair dans la table)
+_LEGACY_SCHEMA = '''
+    CREATE TABLE analyses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_name TEXT NOT NULL,
+        repo_url TEXT NOT NULL,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP,
+        total_modules INTEGER,
+        total_dependencies INTEGER,
+        vulnerabilities_critical INTEGER DEFAULT 0,
+        vulnerabilities_high INTEGER DEFAULT 0,
+        vulnerabilities_medium INTEGER DEFAULT 0,
+        attack_surface_points INTEGER DEFAULT 0,
+        report_path TEXT,
+        error_message TEXT
+    )
+'''
+
+
+@pytest.fixture
+def web_app(tmp_path, monkeypatch):
+    """Module app branché sur une base vide dans tmp_path, avec son propre thread écrivain"""
+    # L'import crée web_reports/ dans le dossier courant
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module('app')
+    monkeypatch.setattr(app, 'DATABASE', str(tmp_path / 'analyses.db'))
+    # Le thread écrivain ouvre sa connexion au démarrage : en relancer un sur cette base
+    monkeypatch.setattr(app, '_writer_pid', None)
+    monkeypatch.setattr(app, '_tls', threading.local())
+    return app
+
+
+def _insert_analysis(app, name='proj'):
+    """Crée une analyse en attente et retourne son identifiant"""
+    return app.execute_write(
+        'INSERT INTO analyses (project_name, repo_url, status) VALUES (?, ?, ?)',
+        (name, f'https://example.com/{name}.git', app.STATUS['pending'])
+    )
+
+
+def test_legacy_text_status_migration(web_app):
+    """Une base d'avant la série passe aux statuts entiers et à la table errors"""
+    conn = sqlite3.connect(web_app.DATABASE)
+    conn.execute(_LEGACY_SCHEMA)
+    conn.executemany(
+        'INSERT INTO analyses (id, project_name, repo_url, status, report_path, error_message) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [
+            (1, 'a', 'https://example.com/a.git', 'completed', 'a/report.html', None),
+            (2, 'b', 'https://example.com/b.git', 'failed', None, 'Timeout'),
+            (3, 'c', 'https://example.com/c.git', 'failed', None, 'Timeout'),
+            (4, 'd', 'https://example.com/d.git', 'running', None, None),
+            (5, 'e', 'https://example.com/e.git', 'pending', None, None),
+        ]
+    )
+    conn.commit()
+    conn.close()
+    
+    web_app.init_db()
+    # Une seconde initialisation ne doit rien changer
+    web_app.init_db()
+    
+    conn = sqlite3.connect(web_app.DATABASE)
+    columns = {row[1]: row[2] for row in conn.execute('PRAGMA table_info(analyses)')}
+    assert columns['status'] == 'INTEGER'
+    assert 'error_message' not in columns
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'analyses_legacy' not in tables
+    
+    rows = conn.execute('''
+        SELECT a.id, a.status, a.report_path, e.message
+        FROM analyses a LEFT JOIN errors e ON e.id = a.error_id
+        ORDER BY a.id
+    ''').fetchall()
+    status = web_app.STATUS
+    assert rows == [
+        (1, status['completed'], 'a/report.html', None),
+        (2, status['failed'], None, 'Timeout'),
+        (3, status['failed'], None, 'Timeout'),
+        (4, status['running'], None, None),
+        (5, status['pending'], None, None),
+    ]
+    assert conn.execute('SELECT COUNT(*) FROM errors').fetchone()[0] == 1
+    conn.close()
+
+
+def test_mark_completed(web_app):
+    """mark_completed enregistre statut, rapport et statistiques en une écriture"""
+    web_app.init_db()
+    analysis_id = _insert_analysis(web_app)
+    
+    web_app.mark_completed(analysis_id, 'proj/report.html', (10, 20, 1, 2, 3, 4))
+    
+    row = web_app.get_db().execute('SELECT * FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
+    assert row['status'] == web_app.STATUS['completed']
+    assert row['completed_at'] is not None
+    assert row['report_path'] == 'proj/report.html'
+    assert (row['total_modules'], row['total_dependencies'], row['vulnerabilities_critical'],
+            row['vulnerabilities_high'], row['vulnerabilities_medium'],
+            row['attack_surface_points']) == (10, 20, 1, 2, 3, 4)
+    assert any(thread.name == 'sqlite-writer' for thread in threading.enumerate())
+
+
+def test_mark_failed_shares_error_messages(web_app):
+    """mark_failed passe l'analyse en échec et ne stocke chaque message qu'une fois"""
+    web_app.init_db()
+    first = _insert_analysis(web_app, 'a')
+    second = _insert_analysis(web_app, 'b')
+    
+    web_app.mark_failed(first, 'Timeout')
+    web_app.mark_failed(second, 'Timeout')
+    
+    db = web_app.get_db()
+    rows = db.execute('''
+        SELECT a.status, a.error_id, e.message
+        FROM analyses a JOIN errors e ON e.id = a.error_id
+        ORDER BY a.id
+    ''').fetchall()
+    assert [(row['status'], row['message']) for row in rows] == [
+        (web_app.STATUS['failed'], 'Timeout'),
+        (web_app.STATUS['failed'], 'Timeout'),
+    ]
+    assert rows[0]['error_id'] == rows[1]['error_id']
+    assert db.execute('SELECT COUNT(*) FROM errors').fetchone()[0] == 1
+
+
+def test_failed_write_does_not_block_writer(web_app):
+    """Une écriture en erreur remonte à l'appelant sans bloquer les suivantes"""
+    web_app.init_db()
+    
+    with pytest.raises(sqlite3.IntegrityError):
+        web_app.execute_write('INSERT INTO analyses (repo_url) VALUES (?)', ('https://example.com/x.git',))
+    
+    analysis_id = _insert_analysis(web_app)
+    web_app.mark_failed(analysis_id, 'Erreur')
+    row = web_app.get_db().execute('SELECT status FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
+    assert row['status'] == web_app.STATUS['failed']
@@ -1,14 +1,37 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, send_file, send_from_directory, stream_with_context
 import sqlite3
 import threading
 import subprocess
 import json
+import mmap
+import multiprocessing
 import os
+import queue
 import sys
 import re
+import shutil
+import tempfile
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 
+# Racine du projet (une seule fois) pour importer les modules de src/ et main.py ;
+# les clones et le cache de l'analyseur y sont rangés, quel que soit le dossier courant
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+from src.ai_advisor import AIAdvisor
+from src.comparer import AnalysisComparer
+
+# File de tâches Celery (optionnel) : workers persistants si un broker est configuré
+try:
+    from celery import Celery, Task
+except ImportError:
+    Celery = None
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
 
@@ -17,6 +40,71 @@ DATABASE = 'analyses.db'
 REPORTS_DIR = Path('web_reports')
 REPORTS_DIR.mkdir(exist_ok=True)
 
+# Taille du fichier WAL (octets) au-delà de laquelle on force un checkpoint
+WAL_CHECKPOINT_SIZE = 16 * 1024 * 1024
+
+# Intervalle (secondes) entre deux vérifications de la taille du WAL
+WAL_CHECK_INTERVAL = 60
+
+# Durée maximale d'une analyse (secondes) - 20 minutes pour les gros projets
+ANALYSIS_TIMEOUT = 1200
+
+# Nombre d'analyses exécutées simultanément par le serveur web (hors Celery) ;
+# chacune peut occuper plusieurs Go, d'où une valeur basse par défaut
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 2))
+
+# Nombre max d'analyses en attente avant de refuser les nouvelles soumissions
+MAX_BACKLOG = 20
+
+# Pool borné d'analyses : chaque thread pilote un processus main.py séparé,
+# tué depuis le serveur s'il dépasse ANALYSIS_TIMEOUT, et la file d'attente
+# du pool absorbe les rafales. main.analyze() n'est pas appelé dans le serveur :
+# un thread ne peut pas être interrompu de force, et l'état global de pyplot
+# n'est pas partagé sans risque entre analyses simultanées (seuls les workers
+# Celery, bornés par time_limit, l'appellent directement)
+_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='analysis')
+
+# Analyses soumises au pool et pas encore terminées (en cours ou en attente)
+_active_jobs = set()
+
+# Suppressions de dossiers d'analyse, une à la fois, hors du thread de requête
+_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cleanup')
+
+# Délai max (secondes) entre deux relectures du statut par un flux SSE
+SSE_POLL_INTERVAL = 15
+
+# Nombre max d'analyses suivies par un même flux SSE (lignes de l'historique)
+SSE_MAX_IDS = 50
+
+# Nombre de threads du serveur WSGI de production (chaque flux SSE en occupe un)
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', 16))
+
+# Longueur max (caractères) d'un message d'erreur stocké en base
+ERROR_MESSAGE_MAX = 500
+
+# Nombre de lignes de stderr de main.py conservées pour le message d'erreur
+STDERR_TAIL_LINES = 20
+
+# Balise du rapport contenant les problèmes sérialisés pour l'agent IA (en octets :
+# le rapport est parcouru sans être décodé, seul le JSON extrait l'est)
+AI_ISSUES_TAG = b'<script id="ai-issues" type="application/json">'
+
+# Compteur de points d'entrée des anciens rapports (sans metrics.json)
+ATTACK_RE = re.compile("Points d'entrée.*?(\\d+)".encode('utf-8'), re.IGNORECASE)
+
+# Liens relatifs du rapport vers les fichiers d'une analyse, réécrits vers l'API
+_ARTIFACT_RE = re.compile(rb'(src|href)="(output_graph_simple\.png|output_graph_metrics\.png|graph_interactive\.html)"')
+
+# Broker Celery (ex: redis://localhost:6379/0) ; sans lui, les analyses tournent dans un thread
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
+celery = None
+if Celery is not None and CELERY_BROKER_URL:
+    celery = Celery('analyses', broker=CELERY_BROKER_URL,
+                    backend=os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL))
+
+# Identifiants des tâches Celery lancées par ce processus (analysis_id -> task_id)
+_celery_tasks = {}
+
 # Agent IA (lazy loading - sera initialisé au premier appel)
 _ai_advisor = None
 
@@ -24,108 +112,473 @@ def get_ai_advisor():
     """Retourne l'agent IA (lazy loading)"""
     global _ai_advisor
     if _ai_advisor is None:
-        sys.path.insert(0, str(Path(__file__).parent.parent))
-        from src.ai_advisor import AIAdvisor
         _ai_advisor = AIAdvisor(provider="auto")
     return _ai_advisor
 
+# Réveille les flux SSE à chaque changement de statut d'une analyse
+_status_changed = threading.Condition()
+
+def notify_status_change():
+    """Signale un changement de statut aux flux SSE en attente"""
+    with _status_changed:
+        _status_changed.notify_all()
+
+# Connexions SQLite de lecture : une par thread
+_tls = threading.local()
+
+# File des écritures, vidée par un unique thread écrivain (démarré à la demande,
+# une fois par processus : les workers Celery forkés n'héritent pas des threads)
+_write_q = queue.Queue()
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+# Nombre max d'opérations d'écriture regroupées dans une même transaction
+WRITE_BATCH_SIZE = 16
+
+# Statuts stockés en entier (lignes et index plus petits qu'un TEXT)
+STATUS = {'pending': 0, 'running': 1, 'completed': 2, 'failed': 3}
+STATUS_NAMES = {code: name for name, code in STATUS.items()}
+
+# Mise à jour de fin d'analyse : texte constant, donc une seule préparation
+# dans le cache d'instructions de la connexion d'écriture
+_COMPLETE_SQL = '''
+    UPDATE analyses 
+    SET status = ?, completed_at = ?, report_path = ?, total_modules = ?, total_dependencies = ?,
+        vulnerabilities_critical = ?, vulnerabilities_high = ?, vulnerabilities_medium = ?,
+        attack_surface_points = ?
+    WHERE id = ?
+'''
+
+# Schéma de la table des analyses (les messages d'erreur sont mutualisés dans errors)
+_ANALYSES_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS analyses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_name TEXT NOT NULL,
+        repo_url TEXT NOT NULL,
+        status INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP,
+        total_modules INTEGER,
+        total_dependencies INTEGER,
+        vulnerabilities_critical INTEGER DEFAULT 0,
+        vulnerabilities_high INTEGER DEFAULT 0,
+        vulnerabilities_medium INTEGER DEFAULT 0,
+        attack_surface_points INTEGER DEFAULT 0,
+        report_path TEXT,
+        error_id INTEGER REFERENCES errors(id)
+    )
+'''
+
 def init_db():
     """Initialise la base de données"""
     conn = sqlite3.connect(DATABASE)
+    # WAL : lecteurs et écrivain ne se bloquent plus (persistant dans le fichier)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
     c = conn.cursor()
     c.execute('''
-        CREATE TABLE IF NOT EXISTS analyses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            project_name TEXT NOT NULL,
-            repo_url TEXT NOT NULL,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            completed_at TIMESTAMP,
-            total_modules INTEGER,
-            total_dependencies INTEGER,
-            vulnerabilities_critical INTEGER DEFAULT 0,
-            vulnerabilities_high INTEGER DEFAULT 0,
-            vulnerabilities_medium INTEGER DEFAULT 0,
-            attack_surface_points INTEGER DEFAULT 0,
-            report_path TEXT,
-            error_message TEXT
+        CREATE TABLE IF NOT EXISTS errors (
+            id INTEGER PRIMARY KEY,
+            message TEXT NOT NULL UNIQUE
         )
     ''')
+    c.execute(_ANALYSES_SCHEMA)
+    
+    # Ancienne base (statut TEXT, message d'erreur en clair) : reconstruire la table
+    columns = {row[1]: row[2] for row in c.execute('PRAGMA table_info(analyses)')}
+    if columns.get('status') == 'TEXT':
+        print("🔧 Migration de la table analyses (statuts entiers, table errors)")
+        # Une seule transaction : une migration interrompue laisse l'ancienne table
+        # intacte (sinon la nouvelle, déjà en statuts entiers, ne serait plus migrée)
+        try:
+            c.executescript('''
+            BEGIN IMMEDIATE;
+            ALTER TABLE analyses RENAME TO analyses_legacy;
+            DROP INDEX IF EXISTS idx_analyses_created;
+            DROP INDEX IF EXISTS idx_analyses_status;
+            DROP INDEX IF EXISTS idx_analyses_status_created;
+        ''' + _ANALYSES_SCHEMA + ''';
+            INSERT OR IGNORE INTO errors (message)
+                SELECT DISTINCT error_message FROM analyses_legacy WHERE error_message IS NOT NULL;
+            INSERT INTO analyses (id, project_name, repo_url, status, created_at, completed_at,
+                                  total_modules, total_dependencies, vulnerabilities_critical,
+                                  vulnerabilities_high, vulnerabilities_medium,
+                                  attack_surface_points, report_path, error_id)
+                SELECT l.id, l.project_name, l.repo_url,
+                       CASE l.status WHEN 'running' THEN 1 WHEN 'completed' THEN 2
+                                     WHEN 'failed' THEN 3 ELSE 0 END,
+                       l.created_at, l.completed_at, l.total_modules, l.total_dependencies,
+                       l.vulnerabilities_critical, l.vulnerabilities_high, l.vulnerabilities_medium,
+                       l.attack_surface_points, l.report_path,
+                       (SELECT e.id FROM errors e WHERE e.message = l.error_message)
+                FROM analyses_legacy l;
+            DROP TABLE analyses_legacy;
+            COMMIT;
+            ''')
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+    
+    # Historique trié par date, analyses terminées par date (page de comparaison),
+    # et index partiel réduit aux analyses actives
+    c.execute('CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses(created_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_analyses_status_created ON analyses(status, created_at DESC)')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_analyses_status ON analyses(status)
+        WHERE status IN (0, 1)
+    ''')
     conn.commit()
     conn.close()
 
-def get_db():
-    """Connexion à la base de données"""
-    conn = sqlite3.connect(DATABASE)
+def _connect():
+    """Ouvre une connexion configurée (autocommit, pragmas de performance)"""
+    # cached_statements : les requêtes répétées (polling du statut) ne sont compilées qu'une fois
+    conn = sqlite3.connect(DATABASE, check_same_thread=False, isolation_level=None,
+                           cached_statements=256)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-8000')
+    conn.execute('PRAGMA busy_timeout=5000')
+    # Garantit que analyses.error_id référence toujours un message existant
+    conn.execute('PRAGMA foreign_keys=ON')
     return conn
 
-def run_analysis(analysis_id, repo_url):
-    """Exécute l'analyse en arrière-plan"""
-    conn = get_db()
-    c = conn.cursor()
+def get_db():
+    """Connexion de lecture réutilisée pour toute la durée de vie du thread"""
+    conn = getattr(_tls, 'conn', None)
+    if conn is None:
+        conn = _connect()
+        _tls.conn = conn
+    return conn
+
+def _writer_loop(write_q):
+    """
+    Thread écrivain unique : regroupe les opérations en attente dans une seule
+    transaction BEGIN IMMEDIATE (un seul COMMIT, jamais de SQLITE_BUSY entre
+    écrivains du processus) et force un checkpoint quand le WAL grossit trop
     
+    Args:
+        write_q: File des opérations (liste d'instructions, Future du résultat)
+    """
+    conn = _connect()
+    wal_path = Path(f'{DATABASE}-wal')
+    last_check = time.monotonic()
+    while True:
+        batch = [write_q.get()]
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                batch.append(write_q.get_nowait())
+            except queue.Empty:
+                break
+        
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for statements, _ in batch:
+                # Un SAVEPOINT par opération : un échec n'annule pas le reste du lot
+                conn.execute('SAVEPOINT op')
+                try:
+                    cursor = None
+                    for sql, params in statements:
+                        cursor = conn.execute(sql, params)
+                    # Lignes d'un RETURNING lues avant le COMMIT, sinon lastrowid
+                    if cursor is not None and cursor.description:
+                        result = cursor.fetchall()
+                    else:
+                        result = cursor.lastrowid if cursor else None
+                    conn.execute('RELEASE op')
+                    results.append((result, None))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO op')
+                    conn.execute('RELEASE op')
+                    results.append((None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            results = [(None, e)] * len(batch)
+        
+        for (_, future), (result, error) in zip(batch, results):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        
+        # Le WAL ne grossit qu'avec les écritures : le vérifier ici suffit
+        if time.monotonic() - last_check > WAL_CHECK_INTERVAL:
+            last_check = time.monotonic()
+            try:
+                if wal_path.exists() and wal_path.stat().st_size > WAL_CHECKPOINT_SIZE:
+                    conn.execute('PRAGMA wal_checkpoint(RESTART)')
+            except Exception as e:
+                print(f"⚠️ Erreur checkpoint WAL : {e}")
+
+def _ensure_writer():
+    """Démarre le thread écrivain du processus courant si nécessaire"""
+    global _write_q, _writer_pid
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid != os.getpid():
+            _write_q = queue.Queue()
+            threading.Thread(target=_writer_loop, args=(_write_q,), name='sqlite-writer', daemon=True).start()
+            _writer_pid = os.getpid()
+
+def execute_writes(statements):
+    """
+    Exécute plusieurs écritures dans une même transaction (via le thread écrivain)
+    
+    Args:
+        statements: Liste de tuples (sql, paramètres)
+        
+    Returns:
+        Lignes retournées par la dernière instruction (RETURNING), sinon son lastrowid
+    """
+    _ensure_writer()
+    future = Future()
+    _write_q.put((statements, future))
+    return future.result()
+
+def execute_write(sql, params=()):
+    """Exécute une écriture dans sa propre opération (voir execute_writes)"""
+    return execute_writes([(sql, params)])
+
+def mark_failed(analysis_id, error_msg, completed_at=None):
+    """Passe une analyse en échec ; chaque message distinct n'est stocké qu'une fois"""
+    execute_writes([
+        ('INSERT OR IGNORE INTO errors (message) VALUES (?)', (error_msg,)),
+        ('''
+            UPDATE analyses 
+            SET status = ?, completed_at = ?, error_id = (SELECT id FROM errors WHERE message = ?)
+            WHERE id = ?
+        ''', (STATUS['failed'], completed_at, error_msg, analysis_id))
+    ])
+
+def mark_completed(analysis_id, report_path, stats):
+    """
+    Enregistre le résultat d'une analyse terminée en une seule écriture
+    
+    Args:
+        analysis_id: Identifiant de l'analyse
+        report_path: Chemin du rapport HTML
+        stats: (modules, dépendances, vulnérabilités critiques, élevées,
+            moyennes, points d'entrée), dans l'ordre des colonnes de _COMPLETE_SQL
+    """
+    execute_write(_COMPLETE_SQL, (STATUS['completed'], datetime.now(), report_path, *stats, analysis_id))
+
+def extract_ai_issues(content):
+    """
+    Extrait le JSON du script ai-issues d'un rapport HTML
+    
+    La balise a une forme fixe (écrite par HTMLReporter) : deux recherches de
+    sous-chaîne suffisent, sans construire d'arbre DOM ni backtracking DOTALL.
+    
+    Args:
+        content: Contenu brut (bytes) du rapport HTML
+        
+    Returns:
+        Texte JSON (éventuellement vide), ou None si la balise est absente
+    """
+    start = content.find(AI_ISSUES_TAG)
+    if start == -1:
+        return None
+    start += len(AI_ISSUES_TAG)
+    end = content.find(b'</script>', start)
+    if end == -1:
+        return None
+    return content[start:end].strip().decode('utf-8')
+
+@contextmanager
+def _atomic_writer(path, mode, **kwargs):
+    """
+    Ouvre un fichier temporaire unique à côté de path, renommé en path une fois
+    écrit : deux requêtes concurrentes ne publient jamais un fichier incomplet
+    
+    Args:
+        path: Chemin final du fichier
+        mode: Mode d'ouverture ('w' ou 'wb')
+        **kwargs: Arguments supplémentaires de open() (ex: encoding)
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with open(fd, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def load_ai_issues(report_path):
+    """
+    Charge les problèmes d'un rapport via le cache issues.json voisin
+    
+    Le rapport ne change plus une fois l'analyse terminée : la première lecture
+    extrait le JSON du HTML et l'écrit dans issues.json, les suivantes ne lisent
+    que ce fichier.
+    
+    Args:
+        report_path: Chemin du rapport HTML
+        
+    Returns:
+        Liste des problèmes, ou None si le rapport n'a pas de script ai-issues
+    """
+    issues_path = report_path.with_name('issues.json')
+    try:
+        with open(issues_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        # Absent ou illisible : reconstruit depuis le rapport
+        pass
+    
+    with open(report_path, 'rb') as f:
+        issues_json = extract_ai_issues(f.read())
+    if issues_json is None:
+        return None
+    issues = json.loads(issues_json) if issues_json else []
+    
+    with _atomic_writer(issues_path, 'w', encoding='utf-8') as f:
+        json.dump(issues, f, ensure_ascii=False)
+    return issues
+
+def rewrite_report(report_path, analysis_id):
+    """
+    Écrit report_rewritten.html : le rapport avec ses liens vers les fichiers
+    de l'analyse pointant sur notre API
+    
+    Le rapport est projeté en mémoire (mmap) et parcouru en une seule passe de
+    regex sur les octets : les segments entre deux liens sont recopiés tels quels
+    dans le fichier de sortie, sans décodage ni copie complète du document.
+    
+    Args:
+        report_path: Chemin du rapport HTML généré
+        analysis_id: Identifiant de l'analyse (préfixe des URLs)
+        
+    Returns:
+        Chemin de la copie réécrite
+    """
+    rewritten_path = report_path.with_name('report_rewritten.html')
+    prefix = b'/analysis/%d/file/' % analysis_id
+    with open(report_path, 'rb') as src, _atomic_writer(rewritten_path, 'wb') as dst:
+        if os.fstat(src.fileno()).st_size:
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                last = 0
+                for match in _ARTIFACT_RE.finditer(mm):
+                    dst.write(mm[last:match.start()])
+                    dst.write(b'%s="%s%s"' % (match[1], prefix, match[2]))
+                    last = match.end()
+                dst.write(mm[last:])
+    return rewritten_path
+
+def _run_main_script(repo_url, analysis_dir, clone_dir):
+    """
+    Lance main.py dans un interpréteur séparé, qui écrit ses fichiers
+    directement dans le dossier de l'analyse
+    
+    Args:
+        repo_url: URL du dépôt à analyser
+        analysis_dir: Dossier de destination des fichiers générés
+        clone_dir: Dossier du clone, propre à l'analyse
+        
+    Returns:
+        Tuple (code de retour, stderr)
+    """
+    # Chemin vers le script main.py (un niveau au-dessus de web_ui)
+    main_script = PROJECT_ROOT / 'main.py'
+    project_root = PROJECT_ROOT
+    
+    print(f"🐍 Script: {main_script}")
+    print(f"📂 Workdir: {project_root}")
+    
+    if not main_script.exists():
+        raise FileNotFoundError(f"Script main.py introuvable: {main_script}")
+    
+    # Lancer l'analyse (dossier de sortie absolu : le processus tourne depuis la racine)
+    output_dir = Path(analysis_dir).resolve()
+    print(f"▶️  Lancement: python3 {main_script} {repo_url} --output-dir={output_dir}")
+    
+    # Les métriques arrivent via metrics.json : stdout n'est pas capturé,
+    # seul stderr est conservé pour le message d'erreur
+    process = subprocess.Popen(
+        ['python3', str(main_script), repo_url, f'--output-dir={output_dir}', f'--clone-dir={clone_dir}'],
+        cwd=str(project_root),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=64 * 1024
+    )
+    
+    # stderr est vidé ligne par ligne dans un thread : le processus ne bloque
+    # jamais sur un tube plein et seules les dernières lignes (celles de
+    # l'exception finale d'une trace) sont gardées en mémoire
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    
+    def drain_stderr():
+        for line in process.stderr:
+            stderr_tail.append(line)
+    
+    drainer = threading.Thread(target=drain_stderr, daemon=True)
+    drainer.start()
+    
+    # Attendre avec un timeout
+    try:
+        process.wait(timeout=ANALYSIS_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise subprocess.TimeoutExpired(process.args, ANALYSIS_TIMEOUT)
+    finally:
+        drainer.join(timeout=5)
+    stderr = ''.join(stderr_tail)[-ERROR_MESSAGE_MAX:]
+    
+    if process.returncode == 0 and not (output_dir / 'report.html').exists():
+        raise Exception("Aucun fichier généré par l'analyse")
+    
+    return process.returncode, stderr
+
+def run_analysis(analysis_id, repo_url, in_process=False):
+    """
+    Exécute l'analyse en arrière-plan
+    
+    Args:
+        analysis_id: Identifiant de l'analyse dans la base
+        repo_url: URL du dépôt à analyser
+        in_process: Appeler main.analyze() directement au lieu de lancer main.py
+    """
+    # Un clone par analyse : deux analyses simultanées du même dépôt ne
+    # suppriment plus le clone l'une de l'autre
+    clone_dir = PROJECT_ROOT / 'input_data' / f'analysis_{analysis_id}'
     try:
         print(f"🔄 Démarrage de l'analyse {analysis_id} pour {repo_url}")
         
         # Mettre à jour le statut
-        c.execute('UPDATE analyses SET status = ? WHERE id = ?', ('running', analysis_id))
-        conn.commit()
+        execute_write('UPDATE analyses SET status = ? WHERE id = ?', (STATUS['running'], analysis_id))
+        notify_status_change()
         
         # Créer un dossier pour cette analyse
         analysis_dir = REPORTS_DIR / f'analysis_{analysis_id}'
         analysis_dir.mkdir(exist_ok=True)
         print(f"📁 Dossier créé: {analysis_dir}")
         
-        # Chemin vers le script main.py (un niveau au-dessus de web_ui)
-        main_script = Path(__file__).parent.parent / 'main.py'
-        project_root = Path(__file__).parent.parent
-        
-        print(f"🐍 Script: {main_script}")
-        print(f"📂 Workdir: {project_root}")
-        
-        if not main_script.exists():
-            raise FileNotFoundError(f"Script main.py introuvable: {main_script}")
-        
-        # Lancer l'analyse
-        print(f"▶️  Lancement: python3 {main_script} {repo_url}")
-        
-        # Utiliser Popen pour voir la progression en temps réel
-        process = subprocess.Popen(
-            ['python3', str(main_script), repo_url],
-            cwd=str(project_root),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        # Attendre avec un timeout
-        try:
-            stdout, stderr = process.communicate(timeout=1200)  # 20 minutes max pour gros projets
-            result_returncode = process.returncode
-        except subprocess.TimeoutExpired:
-            process.kill()
-            stdout, stderr = process.communicate()
-            raise subprocess.TimeoutExpired(process.args, 1200)
+        if in_process:
+            # Worker persistant : l'analyseur (et ses imports) restent chargés,
+            # les fichiers sont écrits directement dans le dossier de l'analyse.
+            # Un processus démon (worker Celery prefork) ne peut pas créer de
+            # processus : l'analyse y reste alors séquentielle.
+            from main import analyze
+            analyze(repo_url, analysis_dir, work_dir=PROJECT_ROOT,
+                    parallel=not multiprocessing.current_process().daemon, clone_dir=clone_dir)
+            result_returncode, stderr = 0, None
+        else:
+            result_returncode, stderr = _run_main_script(repo_url, analysis_dir, clone_dir)
         
         print(f"✅ Analyse terminée avec code: {result_returncode}")
         
         if result_returncode == 0:
-            # Déplacer les fichiers générés
-            files_moved = []
-            for file in ['report.html', 'output_graph_simple.png', 'output_graph_metrics.png', 'graph_interactive.html']:
-                src = project_root / file
-                if src.exists():
-                    dst = analysis_dir / file
-                    src.rename(dst)
-                    files_moved.append(file)
-                    print(f"📦 Déplacé: {file}")
-            
-            if not files_moved:
-                raise Exception("Aucun fichier généré par l'analyse")
-            
             # Extraire les métriques du rapport si possible
             report_path = analysis_dir / 'report.html'
+            metrics_path = analysis_dir / 'metrics.json'
             
             # Parser les résultats (basique - on pourrait améliorer)
             modules = 0
@@ -135,27 +588,38 @@ def run_analysis(analysis_id, repo_url):
             vuln_medium = 0
             attack_points = 0
             
-            # Lire le rapport HTML pour extraire les stats de sécurité
-            if report_path.exists():
+            # Métriques structurées écrites par main.py
+            if metrics_path.exists():
                 try:
-                    with open(report_path, 'r', encoding='utf-8') as f:
+                    with open(metrics_path, 'r', encoding='utf-8') as f:
+                        run_metrics = json.load(f)
+                    modules = run_metrics.get('modules', 0)
+                    deps = run_metrics.get('deps', 0)
+                    vuln = run_metrics.get('vuln', {})
+                    vuln_critical = vuln.get('CRITIQUE', 0)
+                    vuln_high = vuln.get('ÉLEVÉ', 0)
+                    vuln_medium = vuln.get('MOYEN', 0)
+                    attack_points = run_metrics.get('attack_surface', 0)
+                    print(f"📊 Vulnérabilités par sévérité: {vuln_critical} critiques, {vuln_high} élevées, {vuln_medium} moyennes")
+                except Exception as e:
+                    print(f"⚠️  Erreur lecture metrics.json: {e}")
+            
+            # Sinon, lire le rapport HTML pour extraire les stats de sécurité
+            elif report_path.exists():
+                try:
+                    with open(report_path, 'rb') as f:
                         content = f.read()
                     
                     # Extraire les vulnérabilités depuis le JSON
-                    match = re.search(r'<script id="ai-issues" type="application/json">\s*(.*?)\s*</script>', content, re.DOTALL)
-                    if match:
-                        issues_json = match.group(1).strip()
+                    issues_json = extract_ai_issues(content)
+                    if issues_json is not None:
                         if issues_json:
                             vulnerabilities = json.loads(issues_json)
                             print(f"📊 Extraction: {len(vulnerabilities)} vulnérabilités trouvées dans le rapport")
-                            for vuln in vulnerabilities:
-                                severity = vuln.get('severity', '')
-                                if severity == 'CRITIQUE':
-                                    vuln_critical += 1
-                                elif severity == 'ÉLEVÉ':
-                                    vuln_high += 1
-                                elif severity == 'MOYEN':
-                                    vuln_medium += 1
+                            by_severity = Counter(vuln['severity'] for vuln in vulnerabilities if 'severity' in vuln)
+                            vuln_critical = by_severity['CRITIQUE']
+                            vuln_high = by_severity['ÉLEVÉ']
+                            vuln_medium = by_severity['MOYEN']
                             print(f"📊 Vulnérabilités par sévérité: {vuln_critical} critiques, {vuln_high} élevées, {vuln_medium} moyennes")
                         else:
                             print(f"⚠️  Script ai-issues trouvé mais vide")
@@ -163,7 +627,7 @@ def run_analysis(analysis_id, repo_url):
                         print(f"⚠️  Script ai-issues non trouvé dans le rapport")
                     
                     # Extraire les points d'attaque (optionnel - pattern basique)
-                    attack_match = re.search(r'Points d\'entrée.*?(\d+)', content, re.IGNORECASE)
+                    attack_match = ATTACK_RE.search(content)
                     if attack_match:
                         attack_points = int(attack_match.group(1))
                         
@@ -174,63 +638,73 @@ def run_analysis(analysis_id, repo_url):
             else:
                 print(f"⚠️  Rapport introuvable: {report_path}")
             
-            # Extraction basique des métriques depuis stdout
-            for line in stdout.split('\n'):
-                if 'Nœuds (modules)' in line:
-                    try:
-                        modules = int(line.split(':')[1].strip())
-                    except:
-                        pass
-                if 'Arêtes (dépendances)' in line:
-                    try:
-                        deps = int(line.split(':')[1].strip())
-                    except:
-                        pass
+            # Préparer une fois pour toutes le rapport servi et les problèmes pour l'API
+            if report_path.exists():
+                try:
+                    rewrite_report(report_path, analysis_id)
+                    load_ai_issues(report_path)
+                except Exception as e:
+                    print(f"⚠️  Erreur préparation du rapport: {e}")
             
-            c.execute('''
-                UPDATE analyses 
-                SET status = ?, completed_at = ?, total_modules = ?, total_dependencies = ?, report_path = ?,
-                    vulnerabilities_critical = ?, vulnerabilities_high = ?, vulnerabilities_medium = ?,
-                    attack_surface_points = ?
-                WHERE id = ?
-            ''', ('completed', datetime.now(), modules, deps, str(report_path), 
-                  vuln_critical, vuln_high, vuln_medium, attack_points, analysis_id))
+            mark_completed(analysis_id, str(report_path), (modules, deps, vuln_critical,
+                                                           vuln_high, vuln_medium, attack_points))
             print(f"✅ Analyse {analysis_id} terminée avec succès")
         else:
-            error_msg = stderr[:500] if stderr else "Erreur inconnue"
+            error_msg = stderr[:ERROR_MESSAGE_MAX] if stderr else "Erreur inconnue"
             print(f"❌ Erreur analyse {analysis_id}: {error_msg}")
-            c.execute('''
-                UPDATE analyses 
-                SET status = ?, completed_at = ?, error_message = ?
-                WHERE id = ?
-            ''', ('failed', datetime.now(), error_msg, analysis_id))
-        
-        conn.commit()
+            mark_failed(analysis_id, error_msg, datetime.now())
     
     except subprocess.TimeoutExpired:
         error_msg = 'Timeout: analyse trop longue (>20min)'
         print(f"⏱️  {error_msg}")
-        c.execute('''
-            UPDATE analyses 
-            SET status = ?, error_message = ?
-            WHERE id = ?
-        ''', ('failed', error_msg, analysis_id))
-        conn.commit()
+        mark_failed(analysis_id, error_msg)
     
     except Exception as e:
-        error_msg = str(e)[:500]
+        error_msg = str(e)[:ERROR_MESSAGE_MAX]
         print(f"💥 Erreur analyse {analysis_id}: {error_msg}")
         import traceback
         traceback.print_exc()
-        c.execute('''
-            UPDATE analyses 
-            SET status = ?, error_message = ?
-            WHERE id = ?
-        ''', ('failed', error_msg, analysis_id))
-        conn.commit()
+        mark_failed(analysis_id, error_msg)
     
     finally:
-        conn.close()
+        shutil.rmtree(clone_dir, ignore_errors=True)
+        notify_status_change()
+
+def _on_job_done(analysis_id, future):
+    """
+    Libère la place de l'analyse et réveille les flux SSE
+    
+    Args:
+        analysis_id: Identifiant de l'analyse exécutée par le job
+        future: Future du job, terminé
+    """
+    _active_jobs.discard(future)
+    error = future.exception()
+    if error is not None:
+        # run_analysis n'a pas pu enregistrer l'échec : la ligne resterait en cours
+        print(f"💥 Erreur du worker d'analyse {analysis_id} : {error}")
+        try:
+            mark_failed(analysis_id, str(error)[:ERROR_MESSAGE_MAX] or type(error).__name__, datetime.now())
+        except Exception as e:
+            print(f"⚠️ Erreur enregistrement de l'échec : {e}")
+    notify_status_change()
+
+if celery is not None:
+    class AnalysisTask(Task):
+        """Tâche Celery qui reporte les échecs du worker (ex: time_limit) dans la base"""
+        
+        def on_failure(self, exc, task_id, args, kwargs, einfo):
+            mark_failed(args[0], str(exc)[:ERROR_MESSAGE_MAX])
+    
+    @celery.task(base=AnalysisTask, name='analyses.run_analysis', time_limit=ANALYSIS_TIMEOUT + 60)
+    def run_analysis_task(analysis_id, repo_url):
+        """Exécute l'analyse dans un worker Celery"""
+        run_analysis(analysis_id, repo_url, in_process=True)
+
+@app.template_filter('status_name')
+def status_name(code):
+    """Nom lisible d'un code de statut (pour les templates)"""
+    return STATUS_NAMES.get(code, 'pending')
 
 @app.route('/')
 def index():
@@ -243,11 +717,11 @@ def history():
     conn = get_db()
     c = conn.cursor()
     analyses = c.execute('''
-        SELECT * FROM analyses 
+        SELECT id, project_name, repo_url, status, created_at, total_modules, total_dependencies
+        FROM analyses 
         ORDER BY created_at DESC 
         LIMIT 50
     ''').fetchall()
-    conn.close()
     
     return render_template('history.html', analyses=analyses)
 
@@ -256,8 +730,11 @@ def view_analysis(analysis_id):
     """Voir les détails d'une analyse"""
     conn = get_db()
     c = conn.cursor()
-    analysis = c.execute('SELECT * FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
-    conn.close()
+    analysis = c.execute('''
+        SELECT a.*, e.message AS error_message
+        FROM analyses a LEFT JOIN errors e ON e.id = a.error_id
+        WHERE a.id = ?
+    ''', (analysis_id,)).fetchone()
     
     if not analysis:
         return "Analyse non trouvée", 404
@@ -270,7 +747,6 @@ def view_ai_suggestions(analysis_id):
     conn = get_db()
     c = conn.cursor()
     analysis = c.execute('SELECT * FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
-    conn.close()
     
     if not analysis:
         return "Analyse non trouvée", 404
@@ -282,33 +758,34 @@ def get_analysis_issues(analysis_id):
     """Récupère tous les problèmes (vulnérabilités + cycles) d'une analyse"""
     conn = get_db()
     c = conn.cursor()
-    analysis = c.execute('SELECT report_path FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
-    conn.close()
+    analysis = c.execute(
+        'SELECT report_path, status FROM analyses WHERE id = ?', (analysis_id,)
+    ).fetchone()
     
     if not analysis or not analysis['report_path']:
         return jsonify({'error': 'Analyse non trouvée'}), 404
     
     # Charger le rapport HTML et extraire les problèmes
     report_path = Path(analysis['report_path'])
-    if not report_path.exists():
+    try:
+        mtime = report_path.stat().st_mtime
+    except FileNotFoundError:
         return jsonify({'error': 'Rapport introuvable'}), 404
     
+    # Le client a déjà cette version : rien à relire ni à renvoyer
+    etag = f'{analysis_id}-{int(mtime)}'
+    if request.if_none_match.contains(etag):
+        return '', 304
+    
     try:
-        # Lire le rapport HTML
-        with open(report_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extraire le script JSON (si présent dans le rapport)
-        # Chercher le script ai-issues dans le HTML
-        match = re.search(r'<script id="ai-issues" type="application/json">\s*(.*?)\s*</script>', content, re.DOTALL)
-        
-        if match:
-            issues_json = match.group(1)
-            issues = json.loads(issues_json)
-            return jsonify({'issues': issues})
-        else:
-            # Si pas de script, retourner vide
-            return jsonify({'issues': []})
+        # issues.json si disponible, sinon extraction depuis le rapport HTML
+        # (si pas de script, retourner vide)
+        issues = load_ai_issues(report_path)
+        response = jsonify({'issues': issues or []})
+        response.set_etag(etag)
+        if analysis['status'] == STATUS['completed']:
+            response.cache_control.max_age = 31536000
+        return response
     
     except Exception as e:
         print(f"Erreur lors du chargement des problèmes: {e}")
@@ -323,10 +800,9 @@ def compare_page():
     analyses = c.execute('''
         SELECT id, project_name, repo_url, created_at, total_modules, vulnerabilities_critical
         FROM analyses 
-        WHERE status = 'completed'
+        WHERE status = ?
         ORDER BY created_at DESC
-    ''').fetchall()
-    conn.close()
+    ''', (STATUS['completed'],)).fetchall()
     
     return render_template('compare.html', analyses=analyses)
 
@@ -351,9 +827,6 @@ def api_compare():
             return jsonify({'error': 'Analyse introuvable'}), 404
         
         # Comparer
-        sys.path.insert(0, str(Path(__file__).parent.parent))
-        from src.comparer import AnalysisComparer
-        
         comparer = AnalysisComparer(analysis1_data, analysis2_data)
         comparison = comparer.compare()
         recommendations = comparer.get_recommendations()
@@ -375,9 +848,8 @@ def _load_analysis_data(analysis_id):
     conn = get_db()
     c = conn.cursor()
     analysis = c.execute('SELECT * FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
-    conn.close()
     
-    if not analysis or analysis['status'] != 'completed':
+    if not analysis or analysis['status'] != STATUS['completed']:
         print(f"Analyse {analysis_id} introuvable ou non complétée")
         return None
     
@@ -388,22 +860,17 @@ def _load_analysis_data(analysis_id):
         return None
     
     try:
-        with open(report_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extraire les vulnérabilités depuis le JSON
+        # Extraire les vulnérabilités depuis le JSON (issues.json ou rapport HTML)
         vulnerabilities = []
-        match = re.search(r'<script id="ai-issues" type="application/json">\s*(.*?)\s*</script>', content, re.DOTALL)
-        if match:
-            issues_json = match.group(1).strip()
-            if issues_json:
-                try:
-                    vulnerabilities = json.loads(issues_json)
-                    print(f"Analyse {analysis_id} : {len(vulnerabilities)} vulnérabilités chargées depuis JSON")
-                except json.JSONDecodeError as e:
-                    print(f"Erreur JSON pour analyse {analysis_id}: {e}")
-        else:
-            print(f"Pas de script ai-issues trouvé dans le rapport {analysis_id}")
+        try:
+            issues = load_ai_issues(report_path)
+            if issues is not None:
+                vulnerabilities = issues
+                print(f"Analyse {analysis_id} : {len(vulnerabilities)} vulnérabilités chargées depuis JSON")
+            else:
+                print(f"Pas de script ai-issues trouvé dans le rapport {analysis_id}")
+        except json.JSONDecodeError as e:
+            print(f"Erreur JSON pour analyse {analysis_id}: {e}")
         
         # Calculer le total de vulnérabilités
         total_vulns = (analysis['vulnerabilities_critical'] or 0) + \
@@ -460,24 +927,33 @@ def start_analysis():
     if not repo_url:
         return jsonify({'error': 'URL du repository requise'}), 400
     
+    # File d'attente locale saturée : refuser plutôt que d'empiler les analyses
+    if celery is None and len(_active_jobs) >= ANALYSIS_WORKERS + MAX_BACKLOG:
+        return jsonify({'error': 'Trop d\'analyses en attente, réessayez plus tard'}), 503
+    
     # Extraire le nom du projet depuis l'URL
     project_name = repo_url.rstrip('/').split('/')[-1].replace('.git', '')
     
     # Créer l'entrée dans la base de données
-    conn = get_db()
-    c = conn.cursor()
-    c.execute('''
+    analysis_id = execute_write('''
         INSERT INTO analyses (project_name, repo_url, status)
         VALUES (?, ?, ?)
-    ''', (project_name, repo_url, 'pending'))
-    analysis_id = c.lastrowid
-    conn.commit()
-    conn.close()
+    ''', (project_name, repo_url, STATUS['pending']))
     
-    # Lancer l'analyse en arrière-plan
-    thread = threading.Thread(target=run_analysis, args=(analysis_id, repo_url))
-    thread.daemon = True
-    thread.start()
+    # Lancer l'analyse en arrière-plan (worker Celery si disponible, sinon pool local)
+    try:
+        if celery is not None:
+            _celery_tasks[analysis_id] = run_analysis_task.delay(analysis_id, repo_url).id
+        else:
+            future = _executor.submit(run_analysis, analysis_id, repo_url)
+            _active_jobs.add(future)
+            future.add_done_callback(partial(_on_job_done, analysis_id))
+    except Exception as e:
+        # Sans job, la ligne resterait en attente pour toujours
+        error_msg = f"Impossible de lancer l'analyse : {e}"[:ERROR_MESSAGE_MAX]
+        print(f"💥 {error_msg}")
+        mark_failed(analysis_id, error_msg, datetime.now())
+        return jsonify({'error': error_msg}), 503
     
     return jsonify({
         'success': True,
@@ -490,8 +966,12 @@ def analysis_status(analysis_id):
     """Obtenir le statut d'une analyse"""
     conn = get_db()
     c = conn.cursor()
-    analysis = c.execute('SELECT * FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
-    conn.close()
+    analysis = c.execute('''
+        SELECT a.id, a.project_name, a.status, a.created_at, a.completed_at,
+               e.message AS error_message
+        FROM analyses a LEFT JOIN errors e ON e.id = a.error_id
+        WHERE a.id = ?
+    ''', (analysis_id,)).fetchone()
     
     if not analysis:
         return jsonify({'error': 'Analyse non trouvée'}), 404
@@ -499,41 +979,86 @@ def analysis_status(analysis_id):
     return jsonify({
         'id': analysis['id'],
         'project_name': analysis['project_name'],
-        'status': analysis['status'],
+        'status': STATUS_NAMES[analysis['status']],
         'created_at': analysis['created_at'],
         'completed_at': analysis['completed_at'],
-        'error_message': analysis['error_message']
+        'error_message': analysis['error_message'],
+        'task_id': _celery_tasks.get(analysis_id)
     })
 
+@app.route('/api/analysis-stream/<int:analysis_id>')
+def analysis_stream(analysis_id):
+    """Flux SSE : pousse le statut d'une analyse uniquement quand il change"""
+    def generate():
+        last_status = None
+        while True:
+            analysis = get_db().execute('SELECT status FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
+            status = STATUS_NAMES[analysis['status']] if analysis else 'deleted'
+            if status != last_status:
+                last_status = status
+                yield f"data: {json.dumps({'status': status})}\n\n"
+            if status not in ('pending', 'running'):
+                return
+            # Réveil immédiat par run_analysis, relecture périodique sinon (workers Celery)
+            with _status_changed:
+                _status_changed.wait(timeout=SSE_POLL_INTERVAL)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/analyses-stream')
+def analyses_stream():
+    """Flux SSE : pousse les statuts de plusieurs analyses (une seule connexion par page)"""
+    ids = [int(part) for part in request.args.get('ids', '').split(',') if part.isdigit()][:SSE_MAX_IDS]
+    if not ids:
+        return jsonify({'error': 'Identifiants d\'analyses requis'}), 400
+    query = f"SELECT id, status FROM analyses WHERE id IN ({','.join('?' * len(ids))})"
+    
+    def generate():
+        last_statuses = None
+        while True:
+            statuses = dict.fromkeys(map(str, ids), 'deleted')
+            for row in get_db().execute(query, ids):
+                statuses[str(row['id'])] = STATUS_NAMES[row['status']]
+            if statuses != last_statuses:
+                last_statuses = statuses
+                yield f"data: {json.dumps({'statuses': statuses})}\n\n"
+            if not any(status in ('pending', 'running') for status in statuses.values()):
+                return
+            # Réveil immédiat par run_analysis, relecture périodique sinon (workers Celery)
+            with _status_changed:
+                _status_changed.wait(timeout=SSE_POLL_INTERVAL)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
 @app.route('/api/delete-analysis/<int:analysis_id>', methods=['DELETE'])
 def delete_analysis(analysis_id):
     """Supprimer une analyse"""
-    import shutil
-    
-    conn = get_db()
-    c = conn.cursor()
+    # Supprimer de la base de données (une seule instruction, chemin du rapport en retour)
+    rows = execute_write('DELETE FROM analyses WHERE id = ? RETURNING report_path', (analysis_id,))
     
-    # Supprimer le dossier web_reports/analysis_X
-    analysis_dir = REPORTS_DIR / f'analysis_{analysis_id}'
+    # Puis supprimer le dossier web_reports/analysis_X, une fois la suppression validée
+    if rows and rows[0]['report_path']:
+        analysis_dir = Path(rows[0]['report_path']).parent
+    else:
+        analysis_dir = REPORTS_DIR / f'analysis_{analysis_id}'
     if analysis_dir.exists():
-        try:
-            shutil.rmtree(analysis_dir)
-            print(f"✅ Dossier supprimé : {analysis_dir}")
-        except Exception as e:
-            print(f"⚠️ Erreur suppression dossier : {e}")
-    
-    # Supprimer de la base de données
-    c.execute('DELETE FROM analyses WHERE id = ?', (analysis_id,))
-    conn.commit()
-    conn.close()
+        _cleanup_executor.submit(remove_analysis_dir, analysis_dir)
     
     return jsonify({'success': True})
 
+def remove_analysis_dir(analysis_dir):
+    """Supprime le dossier d'une analyse (exécuté en arrière-plan)"""
+    shutil.rmtree(analysis_dir, ignore_errors=True)
+    if analysis_dir.exists():
+        print(f"⚠️ Erreur suppression dossier : {analysis_dir}")
+    else:
+        print(f"✅ Dossier supprimé : {analysis_dir}")
+
 @app.route('/analysis/<int:analysis_id>/file/<filename>')
 def serve_analysis_file(analysis_id, filename):
     """Servir les fichiers statiques d'une analyse (images, graphes)"""
-    from flask import send_file
-    
     # Sécurité: vérifier que le fichier est autorisé
     allowed_files = ['output_graph_simple.png', 'output_graph_metrics.png', 'graph_interactive.html']
     if filename not in allowed_files:
@@ -545,7 +1070,11 @@ def serve_analysis_file(analysis_id, filename):
     if not file_path.exists():
         return "Fichier non trouvé", 404
     
-    return send_file(file_path)
+    # Les fichiers d'une analyse terminée ne changent plus : cache navigateur + 304
+    response = send_from_directory(analysis_dir.resolve(), filename, conditional=True, etag=True, max_age=3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 @app.route('/report/<int:analysis_id>')
 def serve_report(analysis_id):
@@ -553,7 +1082,6 @@ def serve_report(analysis_id):
     conn = get_db()
     c = conn.cursor()
     analysis = c.execute('SELECT report_path FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
-    conn.close()
     
     if not analysis or not analysis['report_path']:
         return "Rapport non trouvé", 404
@@ -562,16 +1090,13 @@ def serve_report(analysis_id):
     if not report_path.exists():
         return "Fichier de rapport introuvable", 404
     
-    # Lire le contenu et corriger les chemins des fichiers
-    with open(report_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Copie réécrite préparée en fin d'analyse (ou à la première requête pour
+    # les anciens rapports) : servie directement, sans repasser par Python
+    rewritten_path = report_path.with_name('report_rewritten.html')
+    if not rewritten_path.exists() or rewritten_path.stat().st_mtime < report_path.stat().st_mtime:
+        rewrite_report(report_path, analysis_id)
     
-    # Remplacer les chemins relatifs par des chemins absolus vers notre API
-    content = content.replace('src="output_graph_simple.png"', f'src="/analysis/{analysis_id}/file/output_graph_simple.png"')
-    content = content.replace('src="output_graph_metrics.png"', f'src="/analysis/{analysis_id}/file/output_graph_metrics.png"')
-    content = content.replace('href="graph_interactive.html"', f'href="/analysis/{analysis_id}/file/graph_interactive.html"')
-    
-    return content
+    return send_file(rewritten_path.resolve(), mimetype='text/html', conditional=True)
 
 @app.route('/api/ai-advisor/status')
 def ai_advisor_status():
@@ -642,5 +1167,16 @@ if __name__ == '__main__':
     print("📊 Accédez à l'interface pour analyser vos projets")
     if debug_mode:
         print("⚠️  Mode DEBUG activé - Ne pas utiliser en production!")
-    
-    app.run(debug=debug_mode, host='0.0.0.0', port=5000)
+        app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
+    else:
+        # Serveur WSGI multi-thread : le serveur de dev sérialise les requêtes
+        try:
+            from waitress import serve
+        except ImportError:
+            serve = None
+        
+        if serve is not None:
+            serve(app, host='0.0.0.0', port=5000, threads=WSGI_THREADS)
+        else:
+            print("⚠️  waitress non installé - serveur Flask multi-thread utilisé")
+            app.run(debug=False, host='0.0.0.0', port=5000, threaded=True)